@@ -0,0 +1,95 @@
+from timeit import timeit
+from tracemalloc import get_traced_memory, start, stop
+from typing import Any, Callable
+
+import file
+
+
+def recursive_length(v: list) -> int:
+    """length as it was before the trampoline, for comparison.
+    >>> recursive_length([2, 5, 7, 9])
+    4
+    """
+    if not v:
+        return 0
+    else:
+        return recursive_length(v[1:]) + 1
+
+
+def recursive_count(x: Any, v: list) -> int:
+    """count as it was before the trampoline, for comparison.
+    >>> recursive_count(2, [2, 5, 6, 2, 4, 2])
+    3
+    """
+    if not v:
+        return 0
+    else:
+        return recursive_count(x, v[1:]) + int(x == v[0])
+
+
+def recursive_remove(x: Any, v: list) -> list:
+    """remove as it was before the list views, for comparison.
+    >>> recursive_remove(4, [4, 2, 3, 4, 2, 4])
+    [2, 3, 2]
+    """
+    if not v:
+        return []
+    elif v[0] == x:
+        return recursive_remove(x, v[1:])
+    else:
+        return [v[0]] + recursive_remove(x, v[1:])
+
+
+def per_element(f: Callable[..., Any], args: tuple, n: int, number: int = 20) -> float:
+    """Average time in nanoseconds spent per element when calling f(*args)."""
+    return timeit(lambda: f(*args), number=number) / number / n * 1e9
+
+
+def bench_trampoline() -> None:
+    """Per element overhead of the recursive functions before and after the
+    trampoline. The plain recursion cannot go past the recursion limit."""
+    print("trampoline, ns per element")
+    print(
+        f"{'n':>8} {'length':>10} {'trampoline':>10} {'count':>10} {'trampoline':>10}"
+    )
+    for n in (100, 500, 900, 3_000, 10_000):
+        v = list(range(n))
+        number = 20 if n < 10_000 else 1
+        before = after = c_before = c_after = "-"
+        if n < 1000:
+            before = f"{per_element(recursive_length, (v,), n, number):.0f}"
+            c_before = f"{per_element(recursive_count, (0, v), n, number):.0f}"
+        after = f"{per_element(file.length, (v,), n, number):.0f}"
+        c_after = f"{per_element(file.count, (0, v), n, number):.0f}"
+        print(f"{n:>8} {before:>10} {after:>10} {c_before:>10} {c_after:>10}")
+
+
+def peak_memory(f: Callable[..., Any], args: tuple) -> float:
+    """Peak memory in kilobytes allocated while calling f(*args)."""
+    start()
+    f(*args)
+    peak = get_traced_memory()[1]
+    stop()
+    return peak / 1000
+
+
+def bench_views() -> None:
+    """Time per element and peak memory of remove before and after the list
+    views, where slicing made every level copy the rest of the list."""
+    print("list views, remove")
+    print(f"{'n':>8} {'ns':>10} {'views ns':>10} {'kB':>10} {'views kB':>10}")
+    for n in (100, 500, 900, 100_000, 1_000_000):
+        v = [i % 7 for i in range(n)]
+        number = 20 if n < 10_000 else 1
+        before = mem_before = "-"
+        if n < 1000:
+            before = f"{per_element(recursive_remove, (3, v), n, number):.0f}"
+            mem_before = f"{peak_memory(recursive_remove, (3, v)):.0f}"
+        after = f"{per_element(file.remove, (3, v), n, number):.0f}"
+        mem_after = f"{peak_memory(file.remove, (3, v)):.0f}"
+        print(f"{n:>8} {before:>10} {after:>10} {mem_before:>10} {mem_after:>10}")
+
+
+if __name__ == "__main__":
+    bench_trampoline()
+    bench_views()
@@ -1,6 +1,150 @@
-from typing import Any, Callable
+from typing import Any, Callable, Generator, Iterable, Iterator, Sequence
+import mmap
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import suppress
-from functools import reduce
+from functools import lru_cache, reduce, wraps
+from heapq import heappop, heappush, merge
+from itertools import compress, repeat
+from math import gcd as _gcd, isqrt, lcm as _lcm
+
+try:
+    import numpy as np
+except ImportError:  # numpy only speeds up the batch functions
+    np = None
+
+
+class _TailCall:
+    """A call that replaces the frame yielding it, see trampoline."""
+
+    __slots__ = ("call",)
+
+    def __init__(self, call: Generator) -> None:
+        self.call = call
+
+
+def trampoline(f: Callable[..., Generator]) -> Callable[..., Any]:
+    """Decorator that runs a recursive function on an explicit stack,
+    so the recursion depth is no longer limited by the call stack.
+    f is written as a generator where every recursive call is yielded,
+    x = yield g.call(...), and the result of the call is sent back.
+    A call in tail position can be yielded as g.tail(...) instead, which
+    replaces the current frame so the stack does not grow at all.
+    Exceptions travel up through the calls just like normal recursion.
+    >>> @trampoline
+    ... def depth(n: int) -> int:
+    ...     return 0 if n == 0 else (yield depth.call(n - 1)) + 1
+    >>> depth(100000)
+    100000
+    >>> @trampoline
+    ... def countdown(n: int) -> int:
+    ...     return n if n == 0 else (yield countdown.tail(n - 1))
+    >>> countdown(100000)
+    0
+    """
+
+    @wraps(f)
+    def run(*args: Any, **kwargs: Any) -> Any:
+        stack = [f(*args, **kwargs)]
+        value, error = None, None
+        while stack:
+            try:
+                if error is None:
+                    call = stack[-1].send(value)
+                else:
+                    call = stack[-1].throw(error)
+            except StopIteration as stop:
+                stack.pop()
+                value, error = stop.value, None
+            except Exception as e:
+                stack.pop()
+                if not stack:
+                    raise
+                value, error = None, e
+            else:
+                if isinstance(call, _TailCall):
+                    stack[-1] = call.call
+                else:
+                    stack.append(call)
+                value, error = None, None
+        return value
+
+    run.call = f  # type: ignore[attr-defined]
+    run.tail = lambda *args, **kwargs: _TailCall(f(*args, **kwargs))  # type: ignore
+    return run
+
+
+class ListView:
+    """Read-only view of a list where slicing gives a new view without copying,
+    so taking the rest of a list in a recursive call is O(1).
+    Wrapping a view returns it as is, slices with a step other than 1 are copied.
+    >>> v = ListView([1, 2, 3, 4])
+    >>> v[1:][0], len(v[1:-1]), v[-1], list(v[2:])
+    (2, 2, 4, [3, 4])
+    >>> v[1:] == [2, 3, 4]
+    True
+    """
+
+    __slots__ = ("_v", "_start", "_stop")
+
+    def __new__(cls, v: Any) -> "ListView":
+        if type(v) is cls:  # views are immutable, so they can be shared
+            return v
+        view = super().__new__(cls)
+        if isinstance(v, ListView):
+            view._v, view._start, view._stop = v._v, v._start, v._stop
+        else:
+            view._v, view._start, view._stop = v, 0, len(v)
+        return view
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, i: Any) -> Any:
+        n = self._stop - self._start
+        if isinstance(i, slice):
+            start, stop, step = i.indices(n)
+            if step != 1:
+                return self._v[self._start + start : self._start + stop : step]
+            view = object.__new__(type(self))
+            view._v, view._start = self._v, self._start + start
+            view._stop = self._start + stop if stop > start else view._start
+            return view
+        if i < 0:
+            i += n
+        if 0 <= i < n:
+            return self._v[self._start + i]
+        raise IndexError(f"{type(self).__name__} index out of range")
+
+    def __iter__(self) -> Iterator:
+        for i in range(self._start, self._stop):
+            yield self._v[i]
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, (ListView, list, tuple, str)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._v[self._start : self._stop]!r})"
+
+
+class StrView(ListView):
+    """ListView of a string, str(view) gives the viewed substring back.
+    A str already stores ASCII text as one byte per character with O(1)
+    indexing, so the view just keeps offsets into it.
+    >>> s = StrView("herme")
+    >>> s[1:][0], str(s[1:-1]), s[3:] == "me", s[5:] == ""
+    ('e', 'erm', True, True)
+    """
+
+    __slots__ = ()
+
+    def __str__(self) -> str:
+        return self._v[self._start : self._stop]
 
 
 def sum_up_to(n: int) -> int:
@@ -8,11 +152,10 @@ def sum_up_to(n: int) -> int:
     Pre-condition: n is a natural number.
     >>> sum_up_to(4)
     10
+    >>> sum_up_to(10**6)
+    500000500000
     """
-    if n == 0:
-        return 0
-    else:
-        return n + sum_up_to(n - 1)
+    return n * (n + 1) // 2
 
 
 def sum_even(n: int) -> int:
@@ -23,11 +166,7 @@ def sum_even(n: int) -> int:
     >>> sum_even(4)
     6
     """
-    n -= n % 2
-    if n == 0:
-        return 0
-    else:
-        return sum_even(n - 2) + n
+    return (n // 2) * (n // 2 + 1)
 
 
 def sum_between(m: int, n: int) -> int:
@@ -38,10 +177,106 @@ def sum_between(m: int, n: int) -> int:
     >>> sum_between(3, 5)
     12
     """
-    if m == n:
-        return n
-    else:
-        return m + sum_between(m + 1, n)
+    return (n - m + 1) * (m + n) // 2
+
+
+def _tree_product(v: Sequence[int], lo: int = 0, hi: int = -1) -> int:
+    """Multiply v[lo:hi] by binary splitting, so the large multiplications
+    are between numbers of about the same size.
+    >>> _tree_product(range(1, 6))
+    120
+    >>> _tree_product([])
+    1
+    """
+    if hi == -1:
+        hi = len(v)
+    if hi - lo <= 16:
+        result = 1
+        for i in range(lo, hi):
+            result *= v[i]
+        return result
+    mid = (lo + hi) // 2
+    return _tree_product(v, lo, mid) * _tree_product(v, mid, hi)
+
+
+def _swing(n: int) -> int:
+    """Calculate the swing factorial n! / ((n // 2)!)^2 from its prime factors.
+    >>> _swing(10)
+    252
+    """
+    factors = []
+    for p in _primes.primes(n):
+        # the exponent of p is the number of odd floor(n / p^k)
+        q, e = n, 0
+        while q >= p:
+            q //= p
+            e += q & 1
+        if e:
+            factors.append(p**e)
+    return _tree_product(factors)
+
+
+def _prime_swing_factorial(n: int) -> int:
+    """Calculate n! as ((n // 2)!)^2 times the swing factorial of n.
+    >>> _prime_swing_factorial(30) == _tree_product(range(1, 31))
+    True
+    """
+    if n < 32:
+        return _tree_product(range(2, n + 1))
+    return _prime_swing_factorial(n // 2) ** 2 * _swing(n)
+
+
+class FactorialCache:
+    """Prime swing factorials that keeps the maxsize most recently used large
+    results, so a factorial a little above one of them only multiplies in
+    the remaining terms. A cached m! is only reused for n >= m. The cached
+    values together hold at most max_bits bits, and larger results are not
+    kept at all. A maxsize of 0 turns the cache off.
+    >>> cache = FactorialCache(maxsize=2, threshold=10)
+    >>> cache.factorial(20) == cache.factorial(21) // 21
+    True
+    >>> list(cache._cache)
+    [20, 21]
+    >>> cache = FactorialCache(threshold=10, max_bits=100)
+    >>> cache.factorial(20) == cache.factorial(21) // 21  # 21! has 66 bits
+    True
+    >>> list(cache._cache)
+    [21]
+    """
+
+    def __init__(
+        self, maxsize: int = 8, threshold: int = 1000, max_bits: int = 1 << 27
+    ) -> None:
+        self.maxsize = maxsize
+        self.threshold = threshold  # smaller factorials are too cheap to cache
+        self.max_bits = max_bits  # 16 MiB
+        self._cache: OrderedDict[int, int] = OrderedDict()
+        self._bits = 0  # total bit length of the cached values
+
+    def factorial(self, n: int) -> int:
+        """Calculate n!, starting from a cached m! when n - m is at most n / 16."""
+        if n < self.threshold or self.maxsize == 0:
+            return _prime_swing_factorial(n)
+        best = -1
+        for m in self._cache:
+            if best < m <= n and n - m <= n // 16:
+                best = m
+        if best == -1:
+            result = _prime_swing_factorial(n)
+        else:
+            self._cache.move_to_end(best)
+            result = self._cache[best] * _tree_product(range(best + 1, n + 1))
+        bits = result.bit_length()
+        if bits > self.max_bits:
+            return result
+        self._bits += bits - self._cache.pop(n, 0).bit_length()
+        self._cache[n] = result
+        while len(self._cache) > self.maxsize or self._bits > self.max_bits:
+            self._bits -= self._cache.popitem(last=False)[1].bit_length()
+        return result
+
+
+_factorials = FactorialCache()
 
 
 def factorial(n: int) -> int:
@@ -49,11 +284,10 @@ def factorial(n: int) -> int:
     Pre-condition n is a natural number.
     >>> factorial(4)
     24
+    >>> factorial(0)
+    1
     """
-    if n == 0:
-        return 1
-    else:
-        return n * factorial(n - 1)
+    return _factorials.factorial(n)
 
 
 def double_factorial(n: int) -> int:
@@ -66,10 +300,13 @@ def double_factorial(n: int) -> int:
     """
     if n <= 0:
         return 1
+    elif n % 2 == 0:
+        return factorial(n // 2) << (n // 2)  # (2k)!! = 2^k k!
     else:
-        return n * double_factorial(n - 2)
+        return _tree_product(range(1, n + 1, 2))
 
 
+@trampoline
 def logarithm(n: int) -> int:
     """Calculate the base 2 logarithm as an floored int for a number.
     >>> logarithm(8)
@@ -80,7 +317,7 @@ def logarithm(n: int) -> int:
     if n <= 1:
         return 0
     else:
-        return 1 + logarithm(n // 2)
+        return 1 + (yield logarithm.call(n // 2))
 
 
 def gcd(m: int, n: int) -> int:
@@ -88,13 +325,10 @@ def gcd(m: int, n: int) -> int:
     Pre-condition: m and n are positive integers.
     >>> gcd(6, 4)
     2
+    >>> gcd(10**9, 1)
+    1
     """
-    if m == n:
-        return m
-    elif m < n:
-        return gcd(m, n - m)
-    else:
-        return gcd(m - n, n)
+    return _gcd(m, n)
 
 
 def lcm(m: int, n: int) -> int:
@@ -103,24 +337,64 @@ def lcm(m: int, n: int) -> int:
     >>> lcm(6, 4)
     12
     """
-    return m * n // gcd(m, n)
+    return m // gcd(m, n) * n if m and n else 0
+
+
+def gcd_many(v: Any) -> int:
+    """Calculate the greatest common divisor of a list or numpy array of integers.
+    The gcd of no numbers is 0.
+    >>> gcd_many([12, 18, 30])
+    6
+    >>> gcd_many([])
+    0
+    """
+    if np is not None and isinstance(v, np.ndarray) and v.dtype != object:
+        v = np.abs(v.ravel())
+        while v.size > 1:
+            # one vectorized gcd per level of the tree
+            w = np.gcd(v[: v.size // 2], v[v.size // 2 : v.size // 2 * 2])
+            v = np.append(w, v[-1:]) if v.size % 2 else w
+        return int(v[0]) if v.size else 0
+    v = v.ravel().tolist() if np is not None and isinstance(v, np.ndarray) else v
+    return _gcd(*v)
 
 
+def lcm_many(v: Any) -> int:
+    """Calculate the least common multiple of a list or numpy array of integers.
+    The lcm of no numbers is 1.
+    >>> lcm_many([4, 6, 10])
+    60
+    >>> lcm_many(range(1, 21))
+    232792560
+    """
+    # numpy integers would overflow, so python ints are used
+    v = v.ravel().tolist() if np is not None and isinstance(v, np.ndarray) else v
+    return _lcm(*v)
+
+
+@trampoline
 def first_digit(n: int, k: int = 10) -> int:
     """Calculate first digit of n in k base representation,
     where n is in base 10 representation.
-    Pre-condition: k is a positive integer.
+    Pre-condition: k is an integer of at least 2.
     >>> first_digit(12, 3)
     1
     >>> first_digit(98)
     9
+    >>> first_digit(5, 1)
+    Traceback (most recent call last):
+        ...
+    ValueError: base must be at least 2
     """
+    if k < 2:
+        raise ValueError("base must be at least 2")
     if n < k:
         return n
     else:
-        return first_digit(n // k, k)
+        return (yield first_digit.call(n // k, k))
 
 
+@trampoline
 def print_multiples(k: int, n: int, _progress: int = 0) -> None:
     """Print the multiples of k that are less than n not including n.
     Pre-condition: k is a positve integer and n is a natural number.
@@ -132,81 +406,546 @@ def print_multiples(k: int, n: int, _progress: int = 0) -> None:
     progress = _progress + k
     if progress < n:
         print(progress)
-        print_multiples(k, n, progress)
+        yield print_multiples.call(k, n, progress)
 
     return None
 
 
-def count_divisors(n: int, _divisor: int = 1) -> int:
+class FactorSieve:
+    """Smallest prime factor table, grown on demand up to cap.
+    spf[i] is the smallest prime dividing i, with spf[0] = 0 and spf[1] = 1.
+    >>> sieve = FactorSieve()
+    >>> sieve.factorize(360)
+    [(2, 3), (3, 2), (5, 1)]
+    >>> sieve.count_divisors(360), sieve.divisor_sum(360)
+    (24, 1170)
+    >>> d, sigma = sieve.divisor_table(10)
+    >>> list(d), list(sigma)
+    ([0, 1, 2, 2, 3, 2, 4, 2, 4, 3, 4], [0, 1, 3, 4, 7, 6, 12, 8, 15, 13, 18])
+    """
+
+    def __init__(self, cap: int = 1 << 22) -> None:
+        self.cap = cap  # largest number the table grows to
+        self._spf = array("I", [0, 1])
+
+    @staticmethod
+    def _sieve(n: int) -> array:
+        """Build the smallest prime factor table for 0 to n."""
+        spf = array("I", range(n + 1))
+        # larger primes first, so the smallest prime is written last
+        for p in reversed(list(_primes.primes(isqrt(n)))):
+            spf[p * p :: p] = array("I", [p]) * ((n - p * p) // p + 1)
+        return spf
+
+    def _table(self, n: int) -> array:
+        """A smallest prime factor table covering n, cached when n is below cap."""
+        if len(self._spf) <= n <= self.cap:
+            size = 2 * len(self._spf)
+            size = n if n > size else size
+            self._spf = self._sieve(size if size < self.cap else self.cap)
+        return self._spf if n < len(self._spf) else self._sieve(n)
+
+    def factorize(self, n: int) -> list[tuple[int, int]]:
+        """Prime factorization of n as increasing (prime, exponent) pairs,
+        using Pollard-Brent rho for n past the table.
+        Pre-condition n is a positive integer."""
+        factors = []
+        if n < len(self._spf) or n <= self.cap:
+            spf = self._table(n)
+            while n > 1:
+                p, e = spf[n], 0
+                while n % p == 0:
+                    n, e = n // p, e + 1
+                factors.append((p, e))
+        else:
+            for p in _small_primes:
+                if n % p == 0:
+                    e = 0
+                    while n % p == 0:
+                        n, e = n // p, e + 1
+                    factors.append((p, e))
+            # what is left only has prime factors above 1000, split them with rho
+            exponents: dict[int, int] = {}
+            stack = [n] if n > 1 else []
+            while stack:
+                m = stack.pop()
+                if miller_rabin(m):
+                    exponents[m] = exponents.get(m, 0) + 1
+                else:
+                    f = pollard_brent(m)
+                    stack += [f, m // f]
+            factors += sorted(exponents.items())
+        return factors
+
+    def count_divisors(self, n: int) -> int:
+        """Calculate d(n), the number of divisors of n."""
+        result = 1
+        for _, e in self.factorize(n):
+            result *= e + 1
+        return result
+
+    def divisor_sum(self, n: int) -> int:
+        """Calculate sigma(n), the sum of the divisors of n including n."""
+        result = 1
+        for p, e in self.factorize(n):
+            result *= (p ** (e + 1) - 1) // (p - 1)
+        return result
+
+    def divisor_table(self, n: int) -> tuple[array, array]:
+        """Calculate d(i) and sigma(i) for every i from 0 to n in one pass.
+        Writing i = p^e * r with p = spf(i) and m = i / p gives
+        d(i) = d(m) + d(r) and sigma(i) = p * sigma(m) + sigma(r)."""
+        spf = self._table(n)
+        if np is not None:
+            return self._divisor_table_numpy(n, spf)
+        rest = array("I", [0]) * (n + 1)  # i with every factor spf(i) removed
+        d = array("I", [0]) * (n + 1)
+        sigma = array("Q", [0]) * (n + 1)
+        if n >= 1:
+            rest[1] = d[1] = sigma[1] = 1
+        for i in range(2, n + 1):
+            p = spf[i]
+            m = i // p
+            r = rest[i] = rest[m] if spf[m] == p else m
+            d[i] = d[m] + d[r]
+            sigma[i] = p * sigma[m] + sigma[r]
+        return d, sigma
+
+    @staticmethod
+    def _divisor_table_numpy(n: int, spf: array) -> tuple[array, array]:
+        """divisor_table with each block [2^k, 2^(k+1)) as one vectorized step,
+        which works because m and r always lie in an earlier block."""
+        spf = np.frombuffer(spf, dtype=np.uint32)
+        rest = np.zeros(n + 1, np.uint32)
+        d = np.zeros(n + 1, np.uint32)
+        sigma = np.zeros(n + 1, np.uint64)
+        if n >= 1:
+            rest[1] = d[1] = sigma[1] = 1
+        lo = 2
+        while lo <= n:
+            hi = 2 * lo if 2 * lo <= n + 1 else n + 1
+            p = spf[lo:hi]
+            m = np.arange(lo, hi, dtype=np.uint32) // p
+            r = np.where(spf[m] == p, rest[m], m)
+            rest[lo:hi] = r
+            d[lo:hi] = d[m] + d[r]
+            sigma[lo:hi] = p.astype(np.uint64) * sigma[m] + sigma[r]
+            lo = hi
+        return array("I", d.tobytes()), array("Q", sigma.tobytes())
+
+
+_factors = FactorSieve()
+
+
+def _expand_divisors(factors: list[tuple[int, int]]) -> list[int]:
+    """All divisors from a prime factorization, in no particular order.
+    >>> sorted(_expand_divisors([(2, 2), (3, 1)]))
+    [1, 2, 3, 4, 6, 12]
+    """
+    divs = [1]
+    for p, e in factors:
+        divs = [d * p**k for d in divs for k in range(e + 1)]
+    return divs
+
+
+def pollard_brent(n: int) -> int:
+    """Find a nontrivial factor of the odd composite n,
+    using Brent's variant of Pollard's rho.
+    >>> pollard_brent(1000000016000000063) in (1000000007, 1000000009)
+    True
+    """
+    c = 0
+    while True:
+        c += 1
+        y, r, q, g = 2, 1, 1, 1
+        x = ys = y
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                # batch the gcd, as it is far more expensive than a multiplication
+                for _ in range(min(128, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = _gcd(q, n)
+                k += 128
+            r *= 2
+        if g == n:  # the batch overshot, redo it one step at a time
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = _gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
+def iter_divisors(n: int) -> Iterator[int]:
+    """Lazily yield the divisors of n in increasing order.
+    Pre-condition n is a positive integer.
+    >>> list(iter_divisors(12))
+    [1, 2, 3, 4, 6, 12]
+    >>> next(iter_divisors(1000000016000000063), None)
+    1
+    """
+    factors = _factors.factorize(n)
+    # each divisor is reached from the one with its last nonzero exponent lowered
+    heap = [(1, 0, (0,) * len(factors))]
+    while heap:
+        d, last, exps = heappop(heap)
+        yield d
+        for i in range(last, len(factors)):
+            p, e = factors[i]
+            if exps[i] < e:
+                heappush(heap, (d * p, i, exps[:i] + (exps[i] + 1,) + exps[i + 1 :]))
+
+
+def count_divisors(n: int) -> int:
     """Calculate number of divisors n has.
     Pre-condition n is a natural number.
     >>> count_divisors(12)
     6
     >>> count_divisors(0)
     0
+    >>> count_divisors(10**18)
+    361
     """
-    if _divisor > n:  # happens if 0 is used as n
-        return 0
-    elif _divisor == n:
-        return 1
-    else:
-        return int(n % _divisor == 0) + count_divisors(n, _divisor + 1)
+    return 0 if n == 0 else _factors.count_divisors(n)
+
+
+def lucas_lehmer(p: int) -> bool:
+    """Check if the Mersenne number 2^p - 1 is a prime using the Lucas-Lehmer test.
+    Pre-condition p is a prime.
+    >>> [p for p in (2, 3, 5, 7, 11, 13) if lucas_lehmer(p)]
+    [2, 3, 5, 7, 13]
+    """
+    if p == 2:
+        return True
+    m = (1 << p) - 1
+    s = 4
+    for _ in range(p - 2):
+        s = s * s - 2 if s > 1 else s * s - 2 + m
+        s = (s & m) + (s >> p)  # s mod 2^p - 1 without a division
+        if s >= m:
+            s -= m
+    return s == 0
+
+
+# the exponents p of the Mersenne primes 2^p - 1, which are known to be all of
+# them up to the last one
+_MERSENNE_EXPONENTS = (2, 3, 5, 7, 13, 17, 19, 31, 61, 89, 107, 127, 521, 607)
+_MERSENNE_EXPONENTS += (1279, 2203, 2281, 3217, 4253, 4423, 9689, 9941, 11213)
+_MERSENNE_EXPONENTS += (19937, 21701, 23209, 44497, 86243, 110503, 132049)
+_MERSENNE_EXPONENTS += (216091, 756839, 859433, 1257787, 1398269, 2976221)
+_MERSENNE_EXPONENTS += (3021377, 6972593)
+
+
+class PerfectNumbers:
+    """The even perfect numbers 2^(p - 1) * (2^p - 1) in increasing order,
+    which by the Euclid-Euler theorem are exactly those where 2^p - 1 is prime.
+    The known Mersenne exponents are used as they are, only larger ones are
+    looked for with the Lucas-Lehmer test.
+    >>> from itertools import islice
+    >>> perfect = PerfectNumbers()
+    >>> list(islice(perfect, 5))
+    [6, 28, 496, 8128, 33550336]
+    >>> perfect.count(10**100)
+    12
+    """
+
+    def __init__(self) -> None:
+        self._exponents = list(_MERSENNE_EXPONENTS)  # p with 2^p - 1 prime
+        self._checked = _MERSENNE_EXPONENTS[-1]  # every p up to this is known
+
+    def _extend(self, bound: int) -> None:
+        """Test the prime exponents up to bound."""
+        if bound > self._checked:
+            for p in _primes.primes(bound):
+                if p > self._checked and lucas_lehmer(p):
+                    self._exponents.append(p)
+            self._checked = bound
+
+    def __iter__(self) -> Iterator[int]:
+        i, bound = 0, 64
+        while True:
+            self._extend(bound)
+            while i < len(self._exponents):
+                p = self._exponents[i]
+                yield (1 << (p - 1)) * ((1 << p) - 1)
+                i += 1
+            bound *= 2
+
+    def count(self, n: int) -> int:
+        """Count the even perfect numbers less than or equal to n."""
+        # 2^(p - 1) * (2^p - 1) has 2p - 1 bits
+        bits = n.bit_length()
+        self._extend((bits + 1) // 2)
+        result = 0
+        for p in self._exponents:
+            if 2 * p - 1 > bits or (
+                2 * p - 1 == bits and (1 << (p - 1)) * ((1 << p) - 1) > n
+            ):
+                break
+            result += 1
+        return result
+
+
+_perfect = PerfectNumbers()
+
+# no odd perfect number is below 10^1500 (Ochem and Rao, 2012)
+_ODD_PERFECT_BOUND = 10**1500
 
 
 def is_perfect(n: int) -> bool:
     """Calculate if an integer n is a perfect number.
-    Pre-condition n is a natural number.
+    Pre-condition n is a natural number, and odd n are below 10^1500, past
+    which it is unknown if odd perfect numbers exist.
     >>> is_perfect(6)
     True
     >>> is_perfect(8)
     False
+    >>> is_perfect(2**126 * (2**127 - 1))
+    True
     """
-
-    def divisor_sum(m: int, _divisor: int = 1) -> int:
-        """Calculate the sum of all divisors for a given number excluding m.
-        >>>divisor_sum(8)
-        7
-        """
-        if _divisor == m:
-            return 0
-        else:
-            a = divisor_sum(m, _divisor + 1)
-            if m % _divisor == 0:
-                a += _divisor
-            return a
-
-    return divisor_sum(n) == n
+    if n <= 0:
+        return False
+    elif n % 2 == 0:
+        k = (n & -n).bit_length()  # n = 2^(k - 1) * m with m odd
+        return n >> (k - 1) == (1 << k) - 1 and is_prime(k) and lucas_lehmer(k)
+    elif n < _ODD_PERFECT_BOUND:
+        return False
+    else:
+        raise ValueError("odd perfect numbers are only ruled out below 10^1500")
 
 
 def count_perfect(n: int) -> int:
     """Calculate the number of perfect numbers smaller than n or equal to n.
-    Pre-condition n is a natural number.
+    Pre-condition n is a natural number below 10^1500, past which it is
+    unknown if odd perfect numbers exist.
     Tests from https://en.wikipedia.org/wiki/Perfect_number.
     >>> count_perfect(27)
     1
     >>> count_perfect(28)
     2
+    >>> count_perfect(10**300)
+    12
     """
-    if n == 0:
-        return 0
-    else:
-        return count_perfect(n - 1) + int(is_perfect(n))
+    if n > _ODD_PERFECT_BOUND:
+        raise ValueError("odd perfect numbers are only ruled out below 10^1500")
+    return _perfect.count(n)
+
+
+class PrimeSieve:
+    """Segmented sieve of Eratosthenes that grows on demand.
+    Only odd numbers are stored, index i in the table tells if 2i + 1 is prime.
+    The table grows up to cap, anything beyond that is sieved segment by segment.
+    >>> sieve = PrimeSieve()
+    >>> sieve.is_prime(97), sieve.is_prime(91)
+    (True, False)
+    >>> sieve.count(100)
+    25
+    >>> list(sieve.primes(20))
+    [2, 3, 5, 7, 11, 13, 17, 19]
+    >>> PrimeSieve(segment=8, cap=64).count(1000)
+    168
+    """
+
+    def __init__(self, segment: int = 1 << 18, cap: int = 1 << 24) -> None:
+        self.segment = segment  # odd numbers sieved at a time
+        self.cap = cap  # largest number the table grows to on its own
+        self._table = bytearray(b"\x00\x01\x01\x01")  # 1, 3, 5, 7
+
+    def _segment(self, a: int, b: int, base: list[int]) -> bytearray:
+        """Sieve the odd numbers from 2a + 1 to 2b - 1 using the odd primes base."""
+        seg = bytearray(b"\x01") * (b - a)
+        lo = 2 * a + 1
+        for p in base:
+            m = p * p
+            if m < lo:
+                m = lo + (-lo) % p
+                if m % 2 == 0:
+                    m += p
+            j = (m - lo) // 2
+            if j < b - a:
+                seg[j::p] = bytes((b - a - j - 1) // p + 1)
+        return seg
+
+    def _odd_primes(self, n: int) -> list[int]:
+        """Odd primes less than or equal to n, n must be covered by the table."""
+        return [2 * i + 1 for i in compress(range((n + 1) // 2), self._table)]
+
+    def _grow(self, n: int) -> None:
+        """Extend the table until it covers n."""
+        while 2 * len(self._table) <= n:
+            a = len(self._table)
+            # the new part can only be sieved with primes already in the table
+            b = min(n // 2 + 1, 2 * a * a) if n // 2 + 1 > 2 * a else 2 * a
+            base = self._odd_primes(isqrt(2 * b - 1))
+            for lo in range(a, b, self.segment):
+                self._table += self._segment(lo, min(lo + self.segment, b), base)
+
+    def _segments(self, n: int) -> Iterator[tuple[int, bytearray]]:
+        """Sieve the odd numbers past the table up to n without storing them.
+        The table must already cover the square root of n."""
+        base = self._odd_primes(isqrt(n))
+        a, end = len(self._table), (n + 1) // 2
+        while a < end:
+            b = min(a + self.segment, end)
+            yield a, self._segment(a, b, base)
+            a = b
+
+    def is_prime(self, n: int) -> bool:
+        """Check if n is a prime, using Miller-Rabin past the table."""
+        if n < 3 or n % 2 == 0:
+            return n == 2
+        if n <= self.cap:
+            self._grow(n)
+        if n < 2 * len(self._table):
+            return self._table[n // 2] == 1
+        else:
+            return miller_rabin(n)
+
+    def count(self, n: int) -> int:
+        """Count the primes less than or equal to n."""
+        if n < 2:
+            return 0
+        self._grow(n if n <= self.cap else self.cap)
+        self._grow(isqrt(n))
+        total = 1 + self._table.count(1, 0, (n + 1) // 2)
+        for _, seg in self._segments(n):
+            total += seg.count(1)
+        return total
+
+    def primes(self, n: int) -> Iterator[int]:
+        """Yield the primes less than or equal to n in increasing order."""
+        if n < 2:
+            return
+        yield 2
+        self._grow(n if n <= self.cap else self.cap)
+        self._grow(isqrt(n))
+        yield from self._odd_primes(
+            n if n < 2 * len(self._table) else 2 * len(self._table) - 1
+        )
+        for a, seg in self._segments(n):
+            for i in compress(range(len(seg)), seg):
+                yield 2 * (a + i) + 1
+
+
+_primes = PrimeSieve()
+_small_primes = tuple(_primes.primes(1000))
+
+
+def _strong_probable_prime(n: int, a: int) -> bool:
+    """Miller-Rabin round checking if the odd number n is a strong probable prime
+    to base a.
+    >>> _strong_probable_prime(2047, 2), _strong_probable_prime(2047, 3)
+    (True, False)
+    """
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(s - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+
+def _jacobi(a: int, n: int) -> int:
+    """Calculate the Jacobi symbol (a/n) for an odd positive n.
+    >>> _jacobi(5, 21), _jacobi(2, 7)
+    (1, 1)
+    """
+    a, result = a % n, 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def _strong_lucas_probable_prime(n: int) -> bool:
+    """Strong Lucas test with Selfridge's parameters for an odd n that is not
+    a perfect square.
+    >>> _strong_lucas_probable_prime(5459)  # 53 * 103, the smallest pseudoprime
+    True
+    >>> _strong_lucas_probable_prime(5461)
+    False
+    """
+    d = 5
+    while _jacobi(d, n) != -1:
+        d = -d - 2 if d > 0 else -d + 2
+    p, q = 1, (1 - d) // 4
+    k, s = n + 1, 0
+    while k % 2 == 0:
+        k, s = k // 2, s + 1
+    u, v, qk = 1, p, q % n  # the sequences at index 1
+    for bit in bin(k)[3:]:
+        u, v, qk = u * v % n, (v * v - 2 * qk) % n, qk * qk % n
+        if bit == "1":
+            u, v = p * u + v, d * u + p * v
+            u, v = (u + n if u % 2 else u) // 2 % n, (v + n if v % 2 else v) // 2 % n
+            qk = qk * q % n
+    if u == 0 or v == 0:
+        return True
+    for _ in range(s - 1):
+        v, qk = (v * v - 2 * qk) % n, qk * qk % n
+        if v == 0:
+            return True
+    return False
 
 
-def is_prime(n: int, _progress: int = 2) -> bool:
+def miller_rabin(n: int) -> bool:
+    """Check if n is a prime using trial division by small primes followed by
+    Miller-Rabin, which is deterministic below 2^64 and Baillie-PSW above.
+    Pre-condition n is a natural number.
+    >>> miller_rabin(2**61 - 1), miller_rabin(2**89 - 1)
+    (True, True)
+    >>> miller_rabin(3825123056546413051)  # strong pseudoprime to bases up to 31
+    False
+    >>> miller_rabin((2**61 - 1) * (2**89 - 1))
+    False
+    """
+    if n < 2:
+        return False
+    for p in _small_primes:
+        if n % p == 0:
+            return n == p
+    if n < _small_primes[-1] ** 2:
+        return True
+    if n < 1 << 64:
+        bases = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+        return all(a % n == 0 or _strong_probable_prime(n, a) for a in bases)
+    return (
+        _strong_probable_prime(n, 2)
+        and isqrt(n) ** 2 != n
+        and _strong_lucas_probable_prime(n)
+    )
+
+
+def is_prime(n: int) -> bool:
     """Calculate if a number is a prime.
     Pre-condition n is a natural number.
     >>> is_prime(7)
     True
     >>> is_prime(9)
     False
+    >>> is_prime(0)
+    False
+    >>> is_prime(18446744073709551557)
+    True
     """
-    if n <= 1:  # 0 and 1 are not prime numbers
-        return False
-    elif _progress == n:
-        return True
-    else:
-        return is_prime(n, _progress + 1) and n % _progress != 0
+    return _primes.is_prime(n)
 
 
 def count_primes(n: int) -> int:
@@ -216,14 +955,29 @@ def count_primes(n: int) -> int:
     3
     >>> count_primes(7)
     4
+    >>> count_primes(10**6)
+    78498
     """
-    if n == 0:
-        return 0
+    return _primes.count(n)
+
+
+def _isqrt_any(x: Any) -> Any:
+    """Integer square root of an int, or of each element in a numpy array.
+    >>> _isqrt_any(99)
+    9
+    """
+    if np is None or not isinstance(x, np.ndarray):
+        return isqrt(x)
+    elif x.dtype == object:
+        return np.frompyfunc(isqrt, 1, 1)(x)
     else:
-        return count_primes(n - 1) + int(is_prime(n))
+        r = np.sqrt(x).astype(x.dtype)  # the float root can be one off
+        r -= r * r > x
+        r += (r + 1) * (r + 1) <= x
+        return r
 
 
-def sum_beyond(k: int) -> int:  # TODO make smarter
+def sum_beyond(k: int) -> int:
     """Calculate the smallest number n where the sum of all natural
     numbers up to n excluding n sums up to at least k.
     Pre-condition k is a natural number.
@@ -231,34 +985,47 @@ def sum_beyond(k: int) -> int:  # TODO make smarter
     2
     >>> sum_beyond(14)
     6
-    """
-
-    def sum_beyond_solver(k: int, progress: int) -> int:
-        """Helper function that solves the sum_beyond,
-        but returns the result as a negative number
-        and needs the starting position + 1.
-        >>> sum_beyond_solver(14)
-        -6
-        """
-        if progress == 0:
-            return 0
-        else:
-            # sr can both store the sum or the result
-            # this depends on if the number is negative
-            # if positive it stores the sum
-            # if negative it stores the result
-            sr = sum_beyond_solver(k, progress - 1)
-            if sr < 0:
-                return sr
-            elif k < sr:
-                return -progress
-            else:
-                return sr + progress
-
-    # if k is 0 for example we need 1 therefore k + 2
-    return -sum_beyond_solver(k, k + 2)
-
-
+    >>> sum_beyond(10**20)
+    14142135625
+    """
+    # n (n - 1) / 2 > k is the same as (2n - 1)^2 > 8k + 8
+    n = (1 + _isqrt_any(8 * k + 9)) // 2
+    return n + (n * (n - 1) // 2 <= k)
+
+
+def series_many(f: Callable[..., int], *args: Any) -> Any:
+    """Evaluate one of the closed form series functions, like sum_up_to,
+    sum_between or sum_beyond, for whole arrays of arguments in one call.
+    Lists give a list back and numpy arrays give a numpy array back.
+    >>> series_many(sum_up_to, [1, 2, 3, 4])
+    [1, 3, 6, 10]
+    >>> series_many(sum_between, [-2, 3], [4, 5])
+    [7, 12]
+    >>> series_many(sum_beyond, [0, 14, 10**20])
+    [2, 6, 14142135625]
+    >>> series_many(sum_up_to, array("i", [100000]))  # int32 items
+    [5000050000]
+    >>> series_many(sum_up_to, array("B", [200]))  # uint8 items
+    [20100]
+    """
+    if np is None:
+        return [f(*xs) for xs in zip(*args)]
+    arrays = []
+    for x in args:
+        a = np.asarray(x)
+        if a.dtype.kind in "iu":
+            # work in int64 whatever the width of the input, and keep products
+            # like n * (n + 1) from overflowing it
+            big = a.size and (a.max() >= 1 << 31 or a.min() <= -(1 << 31))
+            a = a.astype(object if big else np.int64)
+        arrays.append(a)
+    result = f(*arrays)
+    if any(isinstance(x, np.ndarray) for x in args):
+        return result
+    return result.tolist()
+
+
+@trampoline
 def is_palindrome(n: int) -> bool:
     """Calculate if a number is a palindrome.
     Pre-condition n is a natural number.
@@ -279,9 +1046,10 @@ def is_palindrome(n: int) -> bool:
     if ns == "":
         return True
     else:
-        return is_palindrome(int(ns))
+        return (yield is_palindrome.call(int(ns)))
 
 
+@trampoline
 def find_power(k: int, _n: int = 0) -> int:
     """Calculate the smallest int n such that 2^n starts with k.
     Pre-condition k must be a natural number.
@@ -293,55 +1061,138 @@ def find_power(k: int, _n: int = 0) -> int:
     if str(2**_n).startswith(str(k)):
         return _n
     else:
-        return find_power(k, _n + 1)
+        return (yield find_power.call(k, _n + 1))
 
 
+@trampoline
 def length(v: list) -> int:
     """Calculate the length of any list.
     >>> length([2, 5, 7, 9])
     4
     """
+    v = ListView(v)
     if not v:
         return 0
     else:
-        return length(v[1:]) + 1
+        return (yield length.call(v[1:])) + 1
 
 
+@trampoline
 def count(x: Any, v: list) -> int:
     """Calculate the amount of times x apears in v.
     >>> count(2, [2, 5, 6, 2, 4, 2])
     3
     """
+    v = ListView(v)
     if not v:
         return 0
     else:
-        return count(x, v[1:]) + int(x == v[0])
+        return (yield count.call(x, v[1:])) + int(x == v[0])
+
+
+class MultisetIndex:
+    """Frozen multiset of the elements in w, built once so repeated membership,
+    count and subset queries against w do not scan it again.
+    Elements are counted in a hash table, unhashable elements are kept sorted
+    and searched with bisection, and elements that are not totally ordered,
+    like sets, fall back to scanning the list.
+    >>> index = MultisetIndex([3, 1, 3])
+    >>> 3 in index, index.count(3), index.count(2), len(index)
+    (True, 2, 0, 3)
+    >>> MultisetIndex([[1], [2], [1]]).count([1])
+    2
+    """
+
+    __slots__ = ("_items", "_counts", "_sorted")
+
+    def __init__(self, w: Any) -> None:
+        self._items = list(w)
+        self._counts: Counter | None = None
+        self._sorted: list | None = None
+        try:
+            self._counts = Counter(self._items)
+        except TypeError:
+            with suppress(TypeError):
+                s = sorted(self._items)
+                # sets and the like sort without errors but are only partially
+                # ordered, which bisection cannot search
+                if all(a < b or a == b for a, b in zip(s, s[1:])):
+                    self._sorted = s
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, x: Any) -> bool:
+        return self.count(x) > 0
+
+    def _key(self, x: Any) -> tuple[Any, int]:
+        """A key identifying the group of elements equal to x and its size."""
+        if self._counts is not None:
+            try:
+                return x, self._counts.get(x, 0)
+            except TypeError:  # an unhashable x is never equal to a hashable item
+                return None, 0
+        if self._sorted is not None:
+            with suppress(TypeError):
+                lo = bisect_left(self._sorted, x)
+                return lo, bisect_right(self._sorted, x, lo) - lo
+        matches = [i for i, y in enumerate(self._items) if y == x]
+        return (matches[0] if matches else None), len(matches)
+
+    def count(self, x: Any) -> int:
+        """Count the elements equal to x."""
+        return self._key(x)[1]
+
+    def intersect(self, v: list) -> list:
+        """The elements of v that are matched by an unused element of the
+        multiset, going through v from the back."""
+        used: dict = {}
+        result = []
+        for x in reversed(v):
+            key, size = self._key(x)
+            if used.get(key, 0) < size:
+                used[key] = used.get(key, 0) + 1
+                result.append(x)
+        return result
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, MultisetIndex):
+            return NotImplemented
+        if len(self) != len(other):
+            return False
+        if self._counts is not None and other._counts is not None:
+            return self._counts == other._counts
+        return len(self.intersect(other._items)) == len(self)
 
 
+@trampoline
 def member(x: Any, v: list) -> bool:
     """Check if x is in a list v.
     >>> member(3, [2, 3, 4])
     True
     >>> member(6, [2, 3, 4])
     False
+    >>> member(3, MultisetIndex([2, 3, 4]))
+    True
     """
+    if isinstance(v, MultisetIndex):
+        return x in v
+    v = ListView(v)
     if not v:
         return False
     else:
-        return member(x, v[1:]) or x == v[0]
+        return x == v[0] or (yield member.tail(x, v[1:]))
 
 
 def subset(v: list, w: list) -> bool:
-    """Check if v is a subset of w.
+    """Check if v is a subset of w, w can also be a prebuilt MultisetIndex.
     >>> subset([2, 4], [2, 3, 4])
     True
     >>> subset([2, 5], [2, 3, 4])
     False
     """
-    if not v:
-        return True
-    else:
-        return subset(v[1:], w) and member(v[0], w)
+    index = w if isinstance(w, MultisetIndex) else MultisetIndex(w)
+    return all(x in index for x in v)
 
 
 def set_equals(v: list, w: list) -> bool:
@@ -352,18 +1203,13 @@ def set_equals(v: list, w: list) -> bool:
     False
     >>> set_equals([3, 5, 2], [4, 1, 3])
     False
+    >>> w = [4, 2, 3]
+    >>> set_equals([3, 4, 2], w), w
+    (True, [4, 2, 3])
+    >>> set_equals([{1}, {2}, {3}], [{3}, {1}, {2}])
+    True
     """
-    if not v:
-        if w:
-            return False
-        else:
-            return True
-    else:
-        try:
-            w.remove(v[0])
-            return set_equals(v[1:], w)
-        except ValueError:
-            return False
+    return MultisetIndex(v) == MultisetIndex(w)
 
 
 def intersection(v: list, w: list) -> list:
@@ -372,53 +1218,55 @@ def intersection(v: list, w: list) -> list:
     [6, 2]
     >>> intersection([3, 4, 3, 6], [5, 3, 6, 3])
     [6, 3, 3]
+    >>> intersection([{1}, set(), {0}, {0, 3}], [{3}, {0}])
+    [{0}]
     """
-    if not v:
-        return []
-    else:
-        i = intersection(v[1:], w)
-        with suppress(ValueError):
-            w.remove(v[0])
-            i.append(v[0])
-
-        return i
+    index = w if isinstance(w, MultisetIndex) else MultisetIndex(w)
+    return index.intersect(v)
 
 
+@trampoline
 def sum(v: list[int]) -> int:
     """Calculate the sum of all elements in v.
     >>> sum([5, 2, 4])
     11
     """
+    v = ListView(v)
     if not v:
         return 0
     else:
-        return sum(v[1:]) + v[0]
+        return (yield sum.call(v[1:])) + v[0]
 
 
+@trampoline
 def max(v: list[int]) -> int:
     """Compute the maximum value in a list.
     Pre-condition list has at least 1 element.
     >>> max([3, 5, 2, 4])
     5
     """
+    v = ListView(v)
     if len(v) == 1:
         return v[0]
     else:
-        m = max(v[1:])
+        m = yield max.call(v[1:])
         return m if v[0] < m else v[0]
 
 
+@trampoline
 def smaller_than(n: int, v: list[int]) -> int:
     """Count the amount of elements less than n.
     >>> smaller_than(5, [5, 3, 4, 6])
     2
     """
+    v = ListView(v)
     if not v:
         return 0
     else:
-        return smaller_than(n, v[1:]) + int(n > v[0])
+        return (yield smaller_than.call(n, v[1:])) + int(n > v[0])
 
 
+@trampoline
 def two_zeros(v: list[int]) -> bool:
     """Check whether a list contains two consecutive zeros.
     >>> two_zeros([4, 0, 0, 1 , 3])
@@ -426,10 +1274,11 @@ def two_zeros(v: list[int]) -> bool:
     >>> two_zeros([4, 4, 0, 2, 0])
     False
     """
+    v = ListView(v)
     if len(v) <= 1:
         return False
     else:
-        return two_zeros(v[1:]) or v[0] == v[1] == 0
+        return v[0] == v[1] == 0 or (yield two_zeros.tail(v[1:]))
 
 
 def even_after_7(v: list[int]) -> int:
@@ -439,6 +1288,7 @@ def even_after_7(v: list[int]) -> int:
     2
     """
 
+    @trampoline
     def count_even(w: list) -> int:
         """Count the amount of even numbers in a list.
         >>> count_even([3, 5, 2, 4, 3, 6, 1])
@@ -447,17 +1297,19 @@ def even_after_7(v: list[int]) -> int:
         if not w:
             return 0
         else:
-            return count_even(w[1:]) + int(w[0] % 2 == 0)
+            return (yield count_even.call(w[1:])) + int(w[0] % 2 == 0)
 
     return count_even(v[7:])
 
 
+@trampoline
 def even_after_7_other_interpretation(v: list[int]) -> int:
     """Compute the amount of even elements after the first element with the value 7.
     >>> even_after_7_other_interpretation([5, 2, 7, 0, 1, 2, 4])
     3
     """
 
+    @trampoline
     def _count_even(w: list) -> int:
         """Count the amount of even numbers in a list.
         >>> count_even([3, 5, 2, 4, 3, 6, 1])
@@ -466,16 +1318,17 @@ def even_after_7_other_interpretation(v: list[int]) -> int:
         if not w:
             return 0
         else:
-            return _count_even(w[1:]) + int(w[0] % 2 == 0)
+            return (yield _count_even.call(w[1:])) + int(w[0] % 2 == 0)
 
     if not v:
         return 0
     if v[0] == 7:
-        return _count_even(v[1:])
+        return (yield _count_even.call(v[1:]))
     else:
-        return even_after_7_other_interpretation(v[1:])
+        return (yield even_after_7_other_interpretation.call(v[1:]))
 
 
+@trampoline
 def is_sorted(v: list[int]) -> bool:
     """Check if a list is sorted.
     >>> is_sorted([3, 5, 6, 29])
@@ -483,13 +1336,15 @@ def is_sorted(v: list[int]) -> bool:
     >>> is_sorted([3, 2, 6, 29])
     False
     """
+    v = ListView(v)
     if len(v) <= 1:  # always sorted if one or zero elements
         return True
     else:
-        return v[0] <= v[1] and is_sorted(v[1:])
+        return v[0] <= v[1] and (yield is_sorted.tail(v[1:]))
     # return len(v) <= 1 or (v[0] <= v[1] and is_sorted(v[1:]))
 
 
+@trampoline
 def squares(n: int) -> list[int]:
     """Calculate all squares from 1 to and including n.
     Pre-condition n is a natural number.
@@ -500,9 +1355,10 @@ def squares(n: int) -> list[int]:
     if n == 1:
         return s
     else:
-        return squares(n - 1) + s
+        return (yield squares.call(n - 1)) + s
 
 
+@trampoline
 def decreasing_squares(n: int) -> list[int]:
     """Calculate all squares from n to and including 1.
     Pre-condition n is a natural number.
@@ -511,51 +1367,54 @@ def decreasing_squares(n: int) -> list[int]:
     """
     s = [n**2]
     if n > 1:
-        s += decreasing_squares(n - 1)
+        s += yield decreasing_squares.call(n - 1)
     return s
 
 
-def divisors(n: int, _divisor: int = 1) -> list[int]:
+def divisors(n: int) -> list[int]:
     """Calculate the divisors for the number n, including n.
     Pre-condition n is a natural number.
     >>> divisors(12)
     [12, 6, 4, 3, 2, 1]
     >>> divisors(0)
     []
+    >>> divisors(1000000016000000063)
+    [1000000016000000063, 1000000009, 1000000007, 1]
     """
-    if _divisor > n:  # happens if 0 is used as n
-        return []
-    if _divisor == n:  # any number is divisible by itself except 0
-        return [n]
-    else:
-        d = divisors(n, _divisor + 1)
-        if n % _divisor == 0:
-            d.append(_divisor)
-        return d
+    return sorted(_expand_divisors(_factors.factorize(n)), reverse=True) if n else []
 
 
-def square_it(v: list[int]) -> list[int]:
+@trampoline
+def square_it(v: list[int], _out: list[int] | None = None) -> list[int]:
     """Square every number in the list v.
     >>> square_it([3, 5, 7])
     [9, 25, 49]
     """
+    v = ListView(v)
+    out = [] if _out is None else _out
     if not v:
-        return []
+        return out
     else:
-        return [v[0] ** 2] + square_it(v[1:])
+        out.append(v[0] ** 2)
+        return (yield square_it.tail(v[1:], out))
 
 
-def reverse(v: list) -> list:
+@trampoline
+def reverse(v: list, _out: list | None = None) -> list:
     """Reverse a list.
     >>> reverse([4, 1, 3, 12])
     [12, 3, 1, 4]
     """
+    v = ListView(v)
+    out = [] if _out is None else _out
     if not v:
-        return []
+        return out
     else:
-        return reverse(v[1:]) + [v[0]]
+        out.append(v[-1])
+        return (yield reverse.tail(v[:-1], out))
 
 
+@trampoline
 def compare(v: list[int], n: int) -> tuple[int, int, int]:
     """Compute number of elements greater than n,
     the number of elements v equal to n,
@@ -563,76 +1422,355 @@ def compare(v: list[int], n: int) -> tuple[int, int, int]:
     >>> compare([2, 3, 7, 4, 10, 9, 4, 4], 4)
     (3, 3, 2)
     """
+    v = ListView(v)
     if not v:
         return (0, 0, 0)
     else:
-        r = compare(v[1:], n)
+        r = yield compare.call(v[1:], n)
         return (r[0] + int(v[0] > n), r[1] + int(v[0] == n), r[2] + int(v[0] < n))
 
 
-def join(v: list, w: list) -> list:
+@trampoline
+def join(v: list, w: list, _out: list | None = None) -> list:
     """Join v followed by w.
     >>> join([2, 3, 1], [2, 8])
     [2, 3, 1, 2, 8]
     """
+    w = ListView(w)
     if not w:
-        return v
+        return v if _out is None else _out
     else:
-        return join(v + [w[0]], w[1:])
+        out = list(v) if _out is None else _out
+        out.append(w[0])
+        return (yield join.tail(v, w[1:], out))
 
 
 def sorted_join(v: list[int], w: list[int]) -> list[int]:
     """Join 2 sorted lists, usch that the list returned is ordered.
+    On ties the element from w comes first.
     Pre-condition: v and w are sorted lists.
     >>> sorted_join([3, 5, 11, 13], [1, 7, 14])
     [1, 3, 5, 7, 11, 13, 14]
     """
-    if not v or not w:
-        return v + w
-    elif v[0] < w[0]:
-        return [v[0]] + sorted_join(v[1:], w)
-    else:
-        return [w[0]] + sorted_join(v, w[1:])
+    n, m = len(v), len(w)
+    out = [None] * (n + m)
+    i = j = 0
+    while i < n and j < m:
+        if v[i] < w[j]:
+            out[i + j] = v[i]
+            i += 1
+        else:
+            out[i + j] = w[j]
+            j += 1
+    out[i + j :] = v[i:] if i < n else w[j:]
+    return out
 
 
-def shuffle(v: list, w: list) -> list:
+def merge_sorted(*runs: Iterable, key: Callable | None = None) -> Iterator:
+    """Lazily merge any number of sorted iterables, like lines read from
+    sorted files, with heapq.merge.
+    On ties the element from the earlier run comes first.
+    >>> list(merge_sorted([1, 4, 9], iter([2, 3, 10]), (x * x for x in range(3))))
+    [0, 1, 1, 2, 3, 4, 4, 9, 10]
+    >>> list(merge_sorted(["b", "C"], ["a"], key=str.lower))
+    ['a', 'b', 'C']
+    """
+    return merge(*runs, key=key)
+
+
+@trampoline
+def shuffle(v: list, w: list, _out: list | None = None) -> list:
     """Create list where values from v and w alternate.
     Pre-condition: v and w has the same length.
     >>> shuffle([1, 4, 6], [2, 7, 9])
     [1, 2, 4, 7, 6, 9]
     """
+    v, w = ListView(v), ListView(w)
+    out = [] if _out is None else _out
     if not v:
-        return []
+        return out
     else:
-        return [v[0], w[0]] + shuffle(v[1:], w[1:])
+        out += [v[0], w[0]]
+        return (yield shuffle.tail(v[1:], w[1:], out))
 
 
-def remove(x: Any, v: list) -> list:
+@trampoline
+def remove(x: Any, v: list, _out: list | None = None) -> list:
     """Compute list with all occurences of x removed.
     >>> remove(4, [4, 2, 3, 4, 2, 4])
     [2, 3, 2]
     """
+    v = ListView(v)
+    out = [] if _out is None else _out
     if not v:
-        return []
+        return out
     elif v[0] == x:
-        return remove(x, v[1:])
+        return (yield remove.tail(x, v[1:], out))
     else:
-        return [v[0]] + remove(x, v[1:])
+        out.append(v[0])
+        return (yield remove.tail(x, v[1:], out))
+
+
+def _as_needle(pattern: str | bytes, textual: bool) -> str | bytes:
+    """The pattern as str to search text, or as UTF-8 bytes to search binary
+    data."""
+    if textual and not isinstance(pattern, str):
+        return bytes(pattern).decode()
+    if not textual and isinstance(pattern, str):
+        return pattern.encode()
+    return pattern
+
+
+class Pattern:
+    """A pattern compiled once and searched for in str, bytes or mmap text.
+    Text with a native find (str, bytes, bytearray, mmap) is searched in C,
+    which CPython does with the Crochemore-Perrin two-way algorithm for longer
+    patterns, any other sequence, like a memoryview, with Knuth-Morris-Pratt.
+    A str pattern is encoded as UTF-8 to search bytes and the other way round.
+    >>> p = Pattern("aba")
+    >>> p.find("xxababa"), list(p.finditer("xxababa"))
+    (2, [2, 4])
+    >>> p.find(memoryview(b"xxababa")), list(p.scan([b"xab", b"a", b"ba"]))
+    (2, [1, 3])
+    """
+
+    __slots__ = ("pattern", "_needles")
+
+    def __init__(self, pattern: str | bytes) -> None:
+        self.pattern = pattern
+        self._needles: dict[bool, tuple[Any, list[int] | None]] = {}
+
+    def _needle(self, text: Any, failure: bool = False) -> tuple[Any, Any]:
+        """The pattern as str or bytes to match text, with its KMP failure
+        table if asked for, both built on first use."""
+        textual = isinstance(text, (str, StrView))
+        needle, table = self._needles.get(textual, (None, None))
+        if needle is None:
+            needle = _as_needle(self.pattern, textual)
+        if failure and table is None:
+            table = [0] * len(needle)
+            k = 0
+            for i in range(1, len(needle)):
+                while k and needle[i] != needle[k]:
+                    k = table[k - 1]
+                if needle[i] == needle[k]:
+                    k += 1
+                table[i] = k
+        self._needles[textual] = needle, table
+        return needle, table
+
+    def find(self, text: Any, start: int = 0) -> int:
+        """Position of the first match in text at or after start, or -1."""
+        if hasattr(text, "find"):
+            return text.find(self._needle(text)[0], start)
+        needle, table = self._needle(text, failure=True)
+        if not needle:
+            return start if start <= len(text) else -1
+        k = 0
+        for i in range(start, len(text)):
+            c = text[i]
+            while k and c != needle[k]:
+                k = table[k - 1]
+            if c == needle[k]:
+                k += 1
+                if k == len(needle):
+                    return i - k + 1
+        return -1
 
+    def finditer(self, text: Any) -> Iterator[int]:
+        """Positions of all matches in text, overlapping ones included."""
+        i = self.find(text)
+        while i != -1:
+            yield i
+            i = self.find(text, i + 1)
+
+    def scan(self, chunks: Iterable) -> Iterator[int]:
+        """Positions of all matches in the text made of the given chunks, such
+        as blocks read from a file, keeping only one chunk in memory."""
+        if not self.pattern:
+            raise ValueError("cannot scan for an empty pattern")
+        offset, buffer = 0, None
+        for chunk in chunks:
+            buffer = chunk if buffer is None else buffer + chunk
+            for i in self.finditer(buffer):
+                yield offset + i
+            # a match starting in the last len - 1 elements is not complete yet
+            cut = len(buffer) - len(self._needle(buffer)[0]) + 1
+            cut = cut if cut > 0 else 0
+            offset, buffer = offset + cut, buffer[cut:]
+
+    def prefix_of(self, text: Any) -> bool:
+        """Check if the pattern is a prefix of text."""
+        needle = self._needle(text)[0]
+        if hasattr(text, "startswith"):
+            return text.startswith(needle)
+        return len(needle) <= len(text) and all(
+            text[i] == c for i, c in enumerate(needle)
+        )
 
-def s_count(c: str, s: str) -> int:
+    def suffix_of(self, text: Any) -> bool:
+        """Check if the pattern is a suffix of text."""
+        needle = self._needle(text)[0]
+        if hasattr(text, "endswith"):
+            return text.endswith(needle)
+        start = len(text) - len(needle)
+        return start >= 0 and all(text[start + i] == c for i, c in enumerate(needle))
+
+
+class PatternSet:
+    """Aho-Corasick automaton finding every occurrence of many patterns in a
+    single pass over str, bytes or mmap text, whatever the number of patterns.
+    Matches are reported as (position, index of the pattern), in the order in
+    which they end.
+    >>> patterns = PatternSet(["he", "she", "his", "hers"])
+    >>> list(patterns.finditer("ushers"))
+    [(1, 1), (2, 0), (2, 3)]
+    >>> list(patterns.scan([b"ush", b"ers"]))
+    [(1, 1), (2, 0), (2, 3)]
+    """
+
+    __slots__ = ("patterns", "_automata")
+
+    def __init__(self, patterns: Iterable[str | bytes]) -> None:
+        self.patterns = list(patterns)
+        if not all(self.patterns):
+            raise ValueError("patterns must not be empty")
+        self._automata: dict[bool, tuple[list[dict], list[list]]] = {}
+
+    def _automaton(self, textual: bool) -> tuple[list[dict], list[list]]:
+        """The transitions of the automaton over characters, or over byte
+        values for binary text, and the patterns matched in every state, as
+        (length, index). The failure links are folded into the transitions so
+        that every element costs a single lookup."""
+        if textual in self._automata:
+            return self._automata[textual]
+        goto: list[dict] = [{}]
+        out: list[list[tuple[int, int]]] = [[]]
+        for k, p in enumerate(self.patterns):
+            needle = _as_needle(p, textual)
+            state = 0
+            for c in needle:
+                if c not in goto[state]:
+                    goto[state][c] = len(goto)
+                    goto.append({})
+                    out.append([])
+                state = goto[state][c]
+            out[state].append((len(needle), k))
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, child in goto[state].items():
+                queue.append(child)
+                fail[child] = goto[fail[state]].get(c, 0) if state else 0
+                out[child] = out[child] + out[fail[child]]
+            # the failure state is closer to the root, so its transitions are
+            # already complete
+            if state:
+                goto[state] = {**goto[fail[state]], **goto[state]}
+        self._automata[textual] = goto, out
+        return goto, out
+
+    def finditer(self, text: Any) -> Iterator[tuple[int, int]]:
+        """Matches of all patterns in text, overlapping ones included."""
+        return self.scan((text,))
+
+    def scan(self, chunks: Iterable) -> Iterator[tuple[int, int]]:
+        """Matches of all patterns in the text made of the given chunks, such
+        as blocks read from a file, with the automaton carrying its state from
+        one chunk to the next."""
+        offset, state = 0, 0
+        for chunk in chunks:
+            textual = isinstance(chunk, (str, StrView))
+            goto, out = self._automaton(textual)
+            elements = chunk if textual else memoryview(chunk).cast("B")
+            for i, c in enumerate(elements, offset + 1):
+                state = goto[state].get(c, 0)
+                for length, k in out[state]:
+                    yield i - length, k
+            offset += len(chunk)
+
+
+class TextIndex:
+    """Positions of every character of a text, grouped by character and in
+    increasing order within each group, built once so that repeated queries
+    against the same large text do not scan it again.
+    ASCII text is grouped with a NumPy radix sort when NumPy is available.
+    >>> index = TextIndex("abracadabra")
+    >>> index.has_subsequence("aaaa"), index.has_subsequence("rbrb")
+    (True, False)
+    >>> index.count("a"), index.find("r"), index.rfind("r"), index.positions("b").tolist()
+    (5, 2, 9, [1, 8])
+    """
+
+    __slots__ = ("text", "_order", "_spans")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._order = array("I" if len(text) < 1 << 32 else "Q")
+        self._spans: dict[str, tuple[int, int]] = {}
+        # a stable sort of the positions by character groups them per character
+        if np is not None and text.isascii():
+            codes = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+            order = np.argsort(codes, kind="stable")
+            self._order.frombytes(order.astype(f"u{self._order.itemsize}").tobytes())
+            counts = np.bincount(codes, minlength=128).tolist()
+            groups = [(chr(b), k) for b, k in enumerate(counts) if k]
+        else:
+            self._order.extend(sorted(range(len(text)), key=text.__getitem__))
+            groups = sorted(Counter(text).items())
+        lo = 0
+        for c, k in groups:
+            self._spans[c] = lo, lo + k
+            lo += k
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def count(self, c: str) -> int:
+        """Number of occurrences of character c."""
+        lo, hi = self._spans.get(c, (0, 0))
+        return hi - lo
+
+    def find(self, c: str) -> int:
+        """Position of the first occurrence of character c, or -1."""
+        lo, hi = self._spans.get(c, (0, 0))
+        return self._order[lo] if lo < hi else -1
+
+    def rfind(self, c: str) -> int:
+        """Position of the last occurrence of character c, or -1."""
+        lo, hi = self._spans.get(c, (0, 0))
+        return self._order[hi - 1] if lo < hi else -1
+
+    def positions(self, c: str) -> memoryview:
+        """Increasing positions of character c, as a view into the index."""
+        lo, hi = self._spans.get(c, (0, 0))
+        return memoryview(self._order)[lo:hi]
+
+    def has_subsequence(self, s: str) -> bool:
+        """Check if s can be obtained by deleting characters from the text,
+        with a binary search for the next occurrence of every character of s."""
+        i = 0
+        for c in s:
+            lo, hi = self._spans.get(c, (0, 0))
+            j = bisect_left(self._order, i, lo, hi)
+            if j == hi:
+                return False
+            i = self._order[j] + 1
+        return True
+
+
+def s_count(c: str, s: str | TextIndex) -> int:
     """Count number of occurrences character in c, in s.
     >>> s_count("c", "heycyascac")
     3
+    >>> s_count("c", TextIndex("heycyascac"))
+    3
     """
-    if s == "":
-        return 0
-    elif c == s[0]:
-        return s_count(c, s[1:]) + 1
-    else:
-        return s_count(c, s[1:])
+    return s.count(c) if len(c) == 1 else 0
 
 
+@trampoline
 def s_member(c: str, s: str) -> bool:
     """Check if character c is in string s.
     >>> s_member("c", "heycyascac")
@@ -640,7 +1778,8 @@ def s_member(c: str, s: str) -> bool:
     >>> s_member("e", "gfhf")
     False
     """
-    return s != "" and (c == s[0] or s_member(c, s[1:]))
+    s = StrView(s)
+    return s != "" and (c == s[0] or (yield s_member.tail(c, s[1:])))
 
 
 def is_prefix(s1: str, s2: str) -> bool:
@@ -650,7 +1789,7 @@ def is_prefix(s1: str, s2: str) -> bool:
     >>> is_prefix("nau", "nata")
     False
     """
-    return not s1 or (s2 != "" and s1[0] == s2[0] and is_prefix(s1[1:], s2[1:]))
+    return Pattern(s1).prefix_of(s2)
 
 
 def is_suffix(s1: str, s2: str) -> bool:
@@ -660,7 +1799,7 @@ def is_suffix(s1: str, s2: str) -> bool:
     >>> is_suffix("nsa", "nata")
     False
     """
-    return not s1 or (s2 != "" and s1[-1] == s2[-1] and is_suffix(s1[:-1], s2[:-1]))
+    return Pattern(s1).suffix_of(s2)
 
 
 def is_substring(s1: str, s2: str) -> bool:
@@ -669,20 +1808,99 @@ def is_substring(s1: str, s2: str) -> bool:
     True
     >>> is_substring("heya", "aheylo")
     False
+    >>> is_substring(b"ey", b"aheylo")
+    True
     """
-    return s2 != "" and (is_prefix(s1, s2) or is_substring(s1, s2[1:]))
+    return len(s2) > 0 and Pattern(s1).find(s2) != -1
 
 
-def s_contains(s1: str, s2: str) -> bool:
+def s_contains(s1: str | TextIndex, s2: str) -> bool:
     """Check if s2 can be obtained by deleting characters from s1.
+    Each character of s2 is matched with its first occurrence in what is left
+    of s1, so s1 is read once, or not at all when it is a TextIndex.
     >>> s_contains("haea", "hea")
     True
     >>> s_contains("haea", "hya")
     False
+    >>> s_contains(TextIndex("haea"), "hea")
+    True
     """
-    return s2 == "" or (
-        s1 != ""
-        and ((s1[0] == s2[0] and s_contains(s1[1:], s2[1:])) or s_contains(s1[1:], s2))
+    if isinstance(s1, TextIndex):
+        return s1.has_subsequence(s2)
+    rest = iter(s1)
+    return all(c in rest for c in s2)
+
+
+class _Translation(dict):
+    """Translation table mapping every code point with char, computed on first
+    use, so str.translate applies it in a single pass, with the 256 entry
+    table of bytes.translate built from it for binary data.
+    Characters for which char raises a LookupError are checked for before
+    translating, as str.translate would silently leave them unchanged."""
+
+    def __init__(self, char: Callable[[str], str]) -> None:
+        super().__init__()
+        self._char = char
+        self._bytes: bytes | None = None
+        self._undefined = []
+        for i in range(128):
+            with suppress(LookupError):
+                self[i]
+                continue
+            self._undefined.append(chr(i))
+
+    def __missing__(self, i: int) -> str:
+        self[i] = c = self._char(chr(i))
+        return c
+
+    def apply(self, s: Any) -> Any:
+        """Translate a str, or bytes-like data read as Latin-1 which gives
+        bytes or a bytearray."""
+        if not isinstance(s, (str, bytes, bytearray)):
+            s = bytes(s)
+        for c in self._undefined:
+            if (c if isinstance(s, str) else ord(c)) in s:
+                self._char(c)
+        if isinstance(s, str):
+            return s.translate(self)
+        if self._bytes is None:
+            # the undefined characters are known not to occur by now
+            table = [
+                chr(i) if chr(i) in self._undefined else self[i] for i in range(256)
+            ]
+            if any(len(c) != 1 or ord(c) > 255 for c in table):
+                raise ValueError("translation does not map bytes to bytes")
+            self._bytes = "".join(table).encode("latin-1")
+        return s.translate(self._bytes)
+
+
+@lru_cache(maxsize=64)
+def _ceasar_translation(n: int) -> _Translation:
+    return _Translation(
+        lambda c: (
+            " "
+            if c == " "
+            else chr(
+                (ord(c.lower()) + n - ord("a")) % (ord("z") + 1 - ord("a"))
+                + (ord("A") if c.isupper() else ord("a"))
+            )
+        )
+    )
+
+
+_uppercase = _Translation(lambda c: chr(ord(c) - 32) if "a" <= c <= "z" else c)
+_lowercase = _Translation(lambda c: chr(ord(c) + 32) if "A" <= c <= "Z" else c)
+
+
+@lru_cache(maxsize=64)
+def _key_translation(code: frozenset[tuple[str, str]]) -> _Translation:
+    key = dict(code)
+    return _Translation(
+        lambda c: (
+            to_lowercase(key[c.upper()])
+            if "a" <= c <= "z"
+            else key[c] if "A" <= c <= "Z" else c
+        )
     )
 
 
@@ -691,20 +1909,10 @@ def ceasar_code(s: str, n: int) -> str:
     that wraps characters from a-z.
     >>> ceasar_code("heY", 2)
     'jgA'
+    >>> ceasar_code(b"heY", 28)
+    b'jgA'
     """
-    if not s:
-        return ""
-    else:
-        nc = (
-            " "
-            if s[0] == " "
-            else chr(
-                (ord(s[0].lower()) + n - ord("a")) % (ord("z") + 1 - ord("a"))
-                + (ord("A") if s[0].isupper() else ord("a"))
-            )
-        )
-
-        return nc + ceasar_code(s[1:], n)
+    return _ceasar_translation(n % 26).apply(s)
 
 
 def to_uppercase(s: str) -> str:
@@ -712,25 +1920,17 @@ def to_uppercase(s: str) -> str:
     >>> to_uppercase("Hey aA")
     'HEY AA'
     """
-    if not s:
-        return ""
-    elif ord("a") <= ord(s[0]) <= ord("z"):
-        return chr(ord(s[0]) - ord("a") + ord("A")) + to_uppercase(s[1:])
-    else:
-        return s[0] + to_uppercase(s[1:])
+    return _uppercase.apply(s)
 
 
 def to_lowercase(s: str) -> str:
     """Convert all alphabetic characters in string to uppercase.
     >>> to_lowercase("Hey aA")
     'hey aa'
+    >>> to_lowercase(memoryview(b"Hey aA"))
+    b'hey aa'
     """
-    if not s:
-        return ""
-    elif ord("A") <= ord(s[0]) <= ord("Z"):
-        return chr(ord(s[0]) - ord("A") + ord("a")) + to_lowercase(s[1:])
-    else:
-        return s[0] + to_lowercase(s[1:])
+    return _lowercase.apply(s)
 
 
 def toCamelCase(s: str) -> str:
@@ -739,25 +1939,26 @@ def toCamelCase(s: str) -> str:
     >>> toCamelCase("this is  camel case")
     'thisIsCamelCase'
     """
+    return "".join(stream_camel_case((s,)))
 
-    def _trim_left(s: str) -> str:
-        if s == "":
-            return ""
-        elif s[0] == " ":
-            return _trim_left(s[1:])
-        else:
-            return s
-
-    if not s:
-        return ""
-    elif s[0] == " ":
-        t = _trim_left(s[1:])
-        if t == "":
-            return ""
-        else:
-            return to_uppercase(t[0]) + toCamelCase(t[1:])
-    else:
-        return s[0] + toCamelCase(s[1:])
+
+def stream_camel_case(chunks: Iterable[str]) -> Iterator[str]:
+    """toCamelCase over a stream of text chunks.
+    >>> "".join(stream_camel_case(["this is ", " camel case"]))
+    'thisIsCamelCase'
+    """
+    upper_next = False
+    for chunk in chunks:
+        words = chunk.split(" ")
+        out = []
+        for k, word in enumerate(words):
+            upper_next = upper_next or k > 0
+            if word:
+                if upper_next:
+                    word = to_uppercase(word[0]) + word[1:]
+                    upper_next = False
+                out.append(word)
+        yield "".join(out)
 
 
 def equals_ignore_case(s1: str, s2: str) -> bool:
@@ -770,7 +1971,7 @@ def equals_ignore_case(s1: str, s2: str) -> bool:
     return to_lowercase(s1) == to_lowercase(s2)
 
 
-def first_position(c: str, s: str) -> int:
+def first_position(c: str, s: str | TextIndex) -> int:
     """Index of first occurrence of character c in string s,
     returns -1 if it is not in string s.
     >>> first_position("c", "hecac")
@@ -778,47 +1979,38 @@ def first_position(c: str, s: str) -> int:
     >>> first_position("v", "hecac")
     -1
     """
-    if not s:
-        return -1
-    elif c == s[0]:
-        return 0
-    else:
-        r = first_position(c, s[1:])
-        return r if r == -1 else r + 1
+    return s.find(c) if len(c) == 1 else -1
 
 
-def last_position(c: str, s: str) -> int:
+def last_position(c: str, s: str | TextIndex) -> int:
     """Index of last occurrence of character c in string s,
     returns -1 if it is not in string s.
     >>> last_position("c", "hecac")
     4
     >>> last_position("v", "hecac")
     -1
+    >>> last_position("c", TextIndex("hecca"))
+    3
     """
+    return s.rfind(c) if len(c) == 1 else -1
 
-    def _last_position(c: str, s: str) -> int:
-        if not s:
-            return -1
-        elif c == s[-1]:
-            return 1
-        else:
-            r = first_position(c, s[:-1])
-            return r if r == -1 else r + 1
-
-    p = _last_position(c, s)
-    return -1 if p == -1 else len(s) - p
 
-
-def positions(c: str, s: str) -> list[int]:
+def positions(c: str, s: str | TextIndex) -> Sequence[int]:
     """Return list of positions where c occur in s.
+    For a TextIndex they are a view into the index instead of a list.
     >>> positions("h", "heheh")
     [0, 2, 4]
+    >>> positions("h", TextIndex("heheh")).tolist()
+    [0, 2, 4]
     """
-    if not s:
-        return []
-    else:
-        v = [0] if c == s[0] else []
-        return v + [e + 1 for e in positions(c, s[1:])]
+    if isinstance(s, TextIndex):
+        return s.positions(c)
+    result = []
+    i = first_position(c, s)
+    while i != -1:
+        result.append(i)
+        i = s.find(c, i + 1)
+    return result
 
 
 def is_permutation(s1: str, s2: str) -> bool:
@@ -828,15 +2020,37 @@ def is_permutation(s1: str, s2: str) -> bool:
     >>> is_permutation("aba", "abb")
     False
     """
-    if not s1 and not s2:
-        return True
-    elif not s1 or not s2:
-        return False
-    elif s_member(s1[0], s2):
-        p = first_position(s1[0], s2)
-        return is_permutation(s1[1:], s2[:p] + s2[p + 1 :])
-    else:
-        return False
+    return len(s1) == len(s2) and Counter(s1) == Counter(s2)
+
+
+class AnagramIndex:
+    """Words grouped into classes of permutations of each other in a single
+    hashing pass, with their sorted characters as the key of their class.
+    >>> index = AnagramIndex(["listen", "google", "silent", "enlist", "elgoog"])
+    >>> index.groups()
+    [['listen', 'silent', 'enlist'], ['google', 'elgoog']]
+    >>> index.permutations_of("tinsel"), index.permutations_of("tinsels")
+    (['listen', 'silent', 'enlist'], [])
+    """
+
+    __slots__ = ("_classes",)
+
+    def __init__(self, words: Iterable[str]) -> None:
+        self._classes: dict[str, list[str]] = {}
+        for word in words:
+            self._classes.setdefault("".join(sorted(word)), []).append(word)
+
+    def __len__(self) -> int:
+        return len(self._classes)
+
+    def groups(self, min_size: int = 1) -> list[list[str]]:
+        """The classes of at least min_size words, in the order in which
+        their first word was added."""
+        return [v for v in self._classes.values() if len(v) >= min_size]
+
+    def permutations_of(self, word: str) -> list[str]:
+        """The words that are permutations of word."""
+        return list(self._classes.get("".join(sorted(word)), []))
 
 
 def s_reverse(s: str) -> str:
@@ -844,10 +2058,7 @@ def s_reverse(s: str) -> str:
     >>> s_reverse("hey")
     'yeh'
     """
-    if not s:
-        return ""
-    else:
-        return s_reverse(s[1:]) + s[0]
+    return s[::-1]
 
 
 def reverse_words(s: str) -> str:
@@ -855,32 +2066,33 @@ def reverse_words(s: str) -> str:
     >>> reverse_words("lar nar bas")
     'ral ran sab'
     """
+    return "".join(stream_reverse_words((s,)))
 
-    def _split(s: str) -> list[str]:
-        if not s:
-            return []
-        else:
-            p = first_position(" ", s)
-            if p == -1:
-                return [s]
-            else:
-                return [s[:p]] + _split(s[p + 1 :])
 
-    def _reverse_words(v: list[str]) -> list[str]:
-        if not v:
-            return []
-        else:
-            return [v[0][::-1]] + _reverse_words(v[1:])
+def stream_reverse_words(chunks: Iterable[str]) -> Iterator[str]:
+    """reverse_words over a stream of text chunks, holding on to no more than
+    the word that goes on into the next chunk. A space at the very end closes
+    the last word rather than starting an empty one.
+    >>> "".join(stream_reverse_words(["lar n", "ar bas "]))
+    'ral ran sab'
+    """
+    pending: list[str] = []  # the start of a word going on in the next chunk
+    separator = ""
+    for chunk in chunks:
+        words = chunk.split(" ")
+        if len(words) == 1:
+            pending.append(chunk)
+            continue
+        words[0] = "".join(pending) + words[0]
+        pending = [words.pop()]
+        yield separator + " ".join(word[::-1] for word in words)
+        separator = " "
+    last = "".join(pending)
+    if last:
+        yield separator + last[::-1]
 
-    def _join(v: list[str]) -> str:
-        if not v:
-            return ""
-        elif len(v) == 1:
-            return v[0]
-        else:
-            return v[0] + " " + _join(v[1:])
 
-    return _join(_reverse_words(_split(s)))
+_NO_VOWELS = str.maketrans("", "", "aeiouy")
 
 
 def remove_vowels(s: str) -> str:
@@ -888,12 +2100,13 @@ def remove_vowels(s: str) -> str:
     >>> remove_vowels("hey you are fine")
     'h  r fn'
     """
-    if not s:
-        return ""
-    elif s[0] in ["a", "e", "i", "o", "u", "y"]:
-        return remove_vowels(s[1:])
-    else:
-        return s[0] + remove_vowels(s[1:])
+    return s.translate(_NO_VOWELS)
+
+
+def stream_remove_vowels(chunks: Iterable[str]) -> Iterator[str]:
+    """remove_vowels over a stream of text chunks."""
+    for chunk in chunks:
+        yield chunk.translate(_NO_VOWELS)
 
 
 def respace(s: str, n: int) -> str:
@@ -901,24 +2114,46 @@ def respace(s: str, n: int) -> str:
     >>> respace("hey how are you", 2)
     'he yh ow ar ey ou '
     """
+    return "".join(stream_respace((s,), n))
 
-    def _remove_spaces(s: str) -> str:
-        if not s:
-            return ""
-        elif s[0] == " ":
-            return _remove_spaces(s[1:])
-        else:
-            return s[0] + _remove_spaces(s[1:])
 
-    def _respace(s: str, n: int) -> str:
-        if not s:
-            return ""
-        if len(s) >= 2:
-            return s[0:2] + " " + _respace(s[2:], n)
-        else:
-            return s[0]
+def stream_respace(chunks: Iterable[str], n: int) -> Iterator[str]:
+    """respace over a stream of text chunks.
+    >>> "".join(stream_respace(["hey how", " are you"], 3))
+    'hey how are you '
+    """
+    if n < 1:
+        raise ValueError("n must be positive")
+    filled = 0  # characters since the last space added
+    for chunk in chunks:
+        chunk = chunk.replace(" ", "")
+        head = n - filled
+        if len(chunk) < head:
+            filled += len(chunk)
+            yield chunk
+            continue
+        end = len(chunk) - (len(chunk) - head) % n
+        groups = [chunk[:head]] + [chunk[i : i + n] for i in range(head, end, n)]
+        yield " ".join(groups) + " " + chunk[end:]
+        filled = len(chunk) - end
 
-    return _respace(_remove_spaces(s), n)
+
+def pipeline(
+    *stages: Callable[[Iterable[str]], Iterable[str]]
+) -> Callable[[Iterable[str]], Iterator[str]]:
+    """Chain streaming stages, each taking the chunks of the one before it as
+    they come, so no intermediate text is built in full.
+    >>> clean = pipeline(stream_remove_vowels, lambda v: stream_respace(v, 2))
+    >>> "".join(clean(["hey you a", "re fine"]))
+    'hr fn '
+    """
+
+    def run(chunks: Iterable[str]) -> Iterator[str]:
+        for stage in stages:
+            chunks = stage(chunks)
+        return iter(chunks)
+
+    return run
 
 
 def encode_with_key(s: str, code: dict[str, str]) -> str:
@@ -926,14 +2161,59 @@ def encode_with_key(s: str, code: dict[str, str]) -> str:
     >>> encode_with_key("hE y", {"H": "B", "E": "L", "Y": "C"})
     'bL c'
     """
-    if not s:
-        return ""
-    elif ord("a") <= ord(s[0]) <= ord("z"):
-        return to_lowercase(code[to_uppercase(s[0])]) + encode_with_key(s[1:], code)
-    elif ord("A") <= ord(s[0]) <= ord("Z"):
-        return code[s[0]] + encode_with_key(s[1:], code)
-    else:
-        return s[0] + encode_with_key(s[1:], code)
+    return _key_translation(frozenset(code.items())).apply(s)
+
+
+_LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def _letter_stats(chunk: Any, offset: int = 0) -> tuple[list[int], list[int]]:
+    """Number of occurrences of each letter A-Z in a str or bytes-like chunk,
+    ignoring case, and the position of the last one counted from offset, or
+    -1 when there is none."""
+    if np is not None and not isinstance(chunk, str):
+        data = bytes(chunk) if not isinstance(chunk, (bytes, bytearray)) else chunk
+        # counting pairs of bytes in 65536 bins is faster than counting bytes
+        pairs = np.bincount(
+            np.frombuffer(data, np.uint16, len(data) // 2), minlength=1 << 16
+        ).reshape(256, 256)
+        bins = pairs.sum(axis=0) + pairs.sum(axis=1)
+        if len(data) % 2:
+            bins[data[-1]] += 1
+        counts = (bins[65:91] + bins[97:123]).tolist()
+        upper_last = map(data.rfind, _LETTERS.encode())
+        lower_last = map(data.rfind, _LETTERS.lower().encode())
+        last = [
+            -1 if i == j == -1 else offset + (i if i > j else j)
+            for i, j in zip(upper_last, lower_last)
+        ]
+        return counts, last
+    upper = to_uppercase(chunk)
+    letters = _LETTERS if isinstance(upper, str) else _LETTERS.encode()
+    counts = [upper.count(c) for c in letters]
+    last = [-1 if i == -1 else offset + i for i in map(upper.rfind, letters)]
+    return counts, last
+
+
+def _file_letter_stats(path: Any, offset: int, size: int) -> tuple[list, list]:
+    """Letter statistics of size bytes of the file at path from offset."""
+    with open(path, "rb") as file:
+        file.seek(offset)
+        return _letter_stats(file.read(size), offset)
+
+
+def _as_histogram(stats: Iterable[tuple[list[int], list[int]]]) -> dict[str, int]:
+    """Merge the statistics of the chunks of a text into its histogram, with
+    the letters ordered from the one occurring last to the one occurring
+    first, as when counting from the end of the text."""
+    counts, last = [0] * 26, [-1] * 26
+    for chunk_counts, chunk_last in stats:
+        for i in range(26):
+            counts[i] += chunk_counts[i]
+            if chunk_last[i] > last[i]:
+                last[i] = chunk_last[i]
+    order = sorted((i for i in range(26) if counts[i]), key=lambda i: -last[i])
+    return {_LETTERS[i]: counts[i] for i in order}
 
 
 def histogram(s: str) -> dict[str, int]:
@@ -941,14 +2221,60 @@ def histogram(s: str) -> dict[str, int]:
     >>> histogram("tes tss")
     {'S': 3, 'T': 2, 'E': 1}
     """
-    if not s:
-        return dict()
-    elif ord("A") <= ord(to_uppercase(s[0])) <= ord("Z"):
-        h = histogram(s[1:])
-        h[to_uppercase(s[0])] = h.get(to_uppercase(s[0]), 0) + 1
-        return h
-    else:
-        return histogram(s[1:])
+    return _as_histogram([_letter_stats(s)])
+
+
+def stream_histogram(
+    source: Any, chunk_size: int = 1 << 22, processes: int | None = 1
+) -> dict[str, int]:
+    """The histogram of a text too large for memory, read chunk_size bytes at
+    a time from the file at the path source, which is mapped into memory, or
+    taken from source as an iterable of str or bytes chunks, like an open file.
+    With processes other than 1 the chunks are counted by a pool of that many
+    processes, or one per CPU for None, that read their own part of the file.
+    >>> stream_histogram(["tes", " tss"])
+    {'S': 3, 'T': 2, 'E': 1}
+    """
+    if isinstance(source, (str, os.PathLike)):
+        size = os.path.getsize(source)
+        offsets = range(0, size, chunk_size)
+        if processes != 1:
+            with ProcessPoolExecutor(processes) as pool:
+                stats = pool.map(
+                    _file_letter_stats,
+                    repeat(source),
+                    offsets,
+                    repeat(chunk_size),
+                    chunksize=16,
+                )
+                return _as_histogram(stats)
+        if size == 0:
+            return {}
+        with open(source, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return _as_histogram(
+                    _letter_stats(data[i : i + chunk_size], i) for i in offsets
+                )
+
+    def _stats(chunks: Iterable) -> Iterator[tuple[Any, int]]:
+        offset = 0
+        for chunk in chunks:
+            yield chunk, offset
+            offset += len(chunk)
+
+    if processes == 1:
+        return _as_histogram(_letter_stats(*args) for args in _stats(source))
+    workers = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as pool:
+        # a bounded number of chunks in flight keeps the memory use flat
+        pending: deque = deque()
+        stats = []
+        for args in _stats(source):
+            pending.append(pool.submit(_letter_stats, *args))
+            if len(pending) > 2 * workers:
+                stats.append(pending.popleft().result())
+        stats.extend(future.result() for future in pending)
+        return _as_histogram(stats)
 
 
 def replicate(s: str, v: list[int]) -> str:
@@ -957,10 +2283,39 @@ def replicate(s: str, v: list[int]) -> str:
     >>> replicate("tes", [2, 4, 3])
     'tteeeesss'
     """
-    if not s:
-        return ""
-    else:
-        return s[0] * v[0] + replicate(s[1:], v[1:])
+    return "".join([c * k for c, k in zip(s, v)])
+
+
+def stream_replicate(
+    s: Iterable[str], v: Iterable[int], chunk_size: int = 1 << 16
+) -> Iterator[str]:
+    """replicate in chunks of chunk_size characters, the last one shorter, so
+    that even huge counts take constant memory. Writing the chunks with the
+    writelines of a file produces the result without ever holding it.
+    >>> list(stream_replicate("tes", [2, 4, 3], chunk_size=4))
+    ['ttee', 'eess', 's']
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    buffer: list[str] = []
+    size = 0  # characters in the buffer
+    for c, k in zip(s, v):
+        if size + k < chunk_size:
+            buffer.append(c * k)
+            size += k
+            continue
+        head = chunk_size - size
+        buffer.append(c * head)
+        yield "".join(buffer)
+        k -= head
+        if k >= chunk_size:
+            full = c * chunk_size
+            for _ in range(k // chunk_size):
+                yield full
+        size = k % chunk_size
+        buffer = [c * size]
+    if size:
+        yield "".join(buffer)
 
 
 def f_sum(v: list[int]) -> int:
@@ -1050,15 +2405,17 @@ def f_sum_up_to(n: int) -> int:
     >>> f_sum_up_to(0)
     0
     """
-    return reduce(lambda x, y: x + y, range(n), 0)
+    return n * (n - 1) // 2
 
 
 def f_sum_between(m: int, n: int) -> int:
     """Sum between m and n, including m and not n.
     >>> f_sum_between(-2, 4)
     3
+    >>> f_sum_between(4, -2)
+    0
     """
-    return reduce(lambda x, y: x + y, range(m, n), 0)
+    return (n > m) * (n - m) * (m + n - 1) // 2
 
 
 def f_sum_even(n: int) -> int:
@@ -1069,7 +2426,7 @@ def f_sum_even(n: int) -> int:
     >>> f_sum_even(6)
     6
     """
-    return reduce(lambda x, y: x + y, range(0, n, 2), 0)
+    return (n + 1) // 2 * ((n + 1) // 2 - 1)
 
 
 def f_factorial(n: int) -> int:
@@ -1078,7 +2435,7 @@ def f_factorial(n: int) -> int:
     >>> f_factorial(4)
     24
     """
-    return reduce(lambda x, y: x * y, range(1, n + 1), 1)
+    return factorial(n)
 
 
 def f_double_factorial(n: int) -> int:
@@ -1089,7 +2446,7 @@ def f_double_factorial(n: int) -> int:
     >>> f_double_factorial(5)
     15
     """
-    return reduce(lambda x, y: x * y, range(2 + n % 2, n + 1, 2), 1)
+    return double_factorial(n)
 
 
 def f_member(x: Any, v: list) -> bool:
@@ -1110,7 +2467,8 @@ def f_subset(v: list, w: list) -> bool:
     >>> f_subset([3, 4, 2], [1, 2, 5, 3])
     False
     """
-    return reduce(lambda x, y: x and y in w, v, True)
+    index = MultisetIndex(w)
+    return reduce(lambda x, y: x and y in index, v, True)
     #      reduce(lambda x, y: x and y, map(lambda z: z in w, v), True)
 
 
@@ -1119,7 +2477,8 @@ def f_intersection(v: list, w: list) -> list:
     >>> f_intersection([3, 2, 1], [0, 1, 2])
     [2, 1]
     """
-    return list(filter(lambda x: x in w, v))
+    index = MultisetIndex(w)
+    return list(filter(lambda x: x in index, v))
 
 
 def f_smaller_than(n: int, v: list[int]) -> int:
@@ -1136,17 +2495,7 @@ def f_ceasar_code(s: str, n: int) -> str:
     >>> f_ceasar_code("he Y", 2)
     'jg A'
     """
-
-    def _ceasar_char(c: str, n: int) -> str:
-        if c == " ":
-            return " "
-        else:
-            return chr(
-                (ord(c.lower()) + n - ord("a")) % (ord("z") + 1 - ord("a"))
-                + (ord("A") if c.isupper() else ord("a"))
-            )
-
-    return reduce(lambda x, y: x + y, map(lambda z: _ceasar_char(z, n), s), "")
+    return ceasar_code(s, n)
 
 
 def f_to_uppercase(s: str) -> str:
@@ -1154,14 +2503,7 @@ def f_to_uppercase(s: str) -> str:
     >>> f_to_uppercase("heY a")
     'HEY A'
     """
-
-    def _to_uppercase(c: str) -> str:
-        if ord("a") <= ord(c) <= ord("z"):
-            return chr(ord(c) - ord("a") + ord("A"))
-        else:
-            return c
-
-    return reduce(lambda x, y: x + y, map(lambda z: _to_uppercase(z), s), "")
+    return to_uppercase(s)
 
 
 def f_to_lowercase(s: str) -> str:
@@ -1169,14 +2511,7 @@ def f_to_lowercase(s: str) -> str:
     >>> f_to_lowercase("heY a")
     'hey a'
     """
-
-    def _to_lowercase(c: str) -> str:
-        if ord("A") <= ord(c) <= ord("Z"):
-            return chr(ord(c) - ord("A") + ord("a"))
-        else:
-            return c
-
-    return reduce(lambda x, y: x + y, map(lambda z: _to_lowercase(z), s), "")
+    return to_lowercase(s)
 
 
 def f_count_divisors(n: int) -> int:
@@ -1187,8 +2522,7 @@ def f_count_divisors(n: int) -> int:
     >>> f_count_divisors(-8)
     4
     """
-    n = abs(n)
-    return reduce(lambda x, y: x + 1, filter(lambda z: n % z == 0, range(1, n + 1)), 0)
+    return _factors.count_divisors(abs(n))
 
 
 def f_is_perfect(n: int) -> int:
@@ -1199,12 +2533,7 @@ def f_is_perfect(n: int) -> int:
     >>> f_is_perfect(8)
     False
     """
-    return (
-        reduce(
-            lambda x, y: x + y, filter(lambda z: n % z == 0, range(1, n // 2 + 1)), 0
-        )
-        == n
-    )
+    return is_perfect(n)
 
 
 def f_count_perfect(n: int) -> int:
@@ -1216,7 +2545,7 @@ def f_count_perfect(n: int) -> int:
     >>> f_count_perfect(28)
     2
     """
-    return reduce(lambda x, y: x + 1, filter(f_is_perfect, range(1, n + 1)), 0)
+    return count_perfect(n)
 
 
 def f_is_prime(n: int) -> int:
@@ -1226,19 +2555,10 @@ def f_is_prime(n: int) -> int:
     True
     >>> f_is_prime(4)
     False
+    >>> f_is_prime(10**20 + 39)
+    True
     """
-
-    if n == 0:
-        return False
-    else:
-        return (
-            reduce(
-                lambda x, y: x + 1,
-                filter(lambda z: n % z == 0, range(1, n // 2 + 1)),
-                0,
-            )
-            == 1  # Must have 1 divisor to be a prime, as the other is implicitly itself
-        )
+    return _primes.is_prime(n)
 
 
 def f_count_primes(n: int) -> int:
@@ -1249,7 +2569,7 @@ def f_count_primes(n: int) -> int:
     >>> f_count_primes(6)
     3
     """
-    return reduce(lambda x, y: x + 1, filter(f_is_prime, range(n + 1)), 0)
+    return _primes.count(n)
 
 
 def f_two_zeros(v: list[int]) -> bool:
@@ -1301,13 +2621,14 @@ def f_compare(v: list[int], n: int) -> tuple[int, int, int]:
     )
 
 
-def f_positions(c: str, s: str) -> list[int]:
+def f_positions(c: str, s: str | TextIndex) -> list[int]:
     """Return list of positions where c occur in s.
-    >>> positions("h", "heheh")
+    >>> f_positions("h", "heheh")
     [0, 2, 4]
     """
-    return reduce(lambda x, y: x + [y] if y else x, map(lambda z: z == c, s), [])
-    #      reduce(lambda x, y: x + [y] if y == c else x, s, [])
+    if isinstance(s, TextIndex):
+        return s.positions(c).tolist()
+    return positions(c, s)
 
 
 def f_replicate(s: str, v: list[int]) -> str:
@@ -1316,7 +2637,7 @@ def f_replicate(s: str, v: list[int]) -> str:
     >>> f_replicate("tes", [2, 4, 3])
     'tteeeesss'
     """
-    return reduce(lambda x, y: x + y[0] * y[1], zip(s, v), "")
+    return "".join(map(lambda c, k: c * k, s, v))
 
 
 def f_remove_vowels(s: str) -> str:
@@ -1336,16 +2657,7 @@ def f_encode_with_key(s: str, code: dict[str, str]) -> str:
     >>> f_encode_with_key("hE y", {"H": "B", "E": "L", "Y": "C"})
     'bL c'
     """
-
-    def _encode_char(c: str, code_: dict[str, str]) -> str:
-        if ord("a") <= ord(c) <= ord("z"):
-            return to_lowercase(code_[to_uppercase(c)])
-        elif ord("A") <= ord(c) <= ord("Z"):
-            return code_[c]
-        else:
-            return c
-
-    return reduce(lambda x, y: x + y, map(lambda z: _encode_char(z, code), s), "")
+    return encode_with_key(s, code)
 
 
 def f_gcd(m: int, n: int) -> int:
@@ -1354,14 +2666,13 @@ def f_gcd(m: int, n: int) -> int:
     >>> f_gcd(12, 4)
     4
     """
-
-    return gcd(m, n)  # TODO
+    return gcd(m, n)
 
 
 def f_first_digit(n: int, k: int = 10) -> int:
     """Calculate first digit of n in k base representation,
     where n is in base 10 representation.
-    Pre-condition: k is a positive integer.
+    Pre-condition: k is an integer of at least 2.
     >>> first_digit(12, 3)
     1
     >>> first_digit(98)
@@ -1467,7 +2778,7 @@ def lc_divisors(n: int) -> list[int]:
     >>> lc_divisors(12)
     [1, 2, 3, 4, 6, 12]
     """
-    return [i for i in range(1, n + 1) if n % i == 0]
+    return sorted(_expand_divisors(_factors.factorize(n))) if n > 0 else []
 
 
 def lc_square_it(v: list[int]) -> list[int]:
@@ -1494,11 +2805,13 @@ def lc_remove(x: Any, v: list) -> list:
     return [e for e in v if e != x]
 
 
-def lc_positions(c: str, s: str) -> list[int]:
+def lc_positions(c: str, s: str | TextIndex) -> list[int]:
     """Return list of positions where c occur in s.
     >>> lc_positions("h", "heheh")
     [0, 2, 4]
     """
+    if isinstance(s, TextIndex):
+        return s.positions(c).tolist()
     return [i for i, e in enumerate(s) if e == c]
 
 
@@ -1607,6 +2920,7 @@ def roman_to_num(num: str) -> int:
     return reduce(lambda x, y: x + y, map(_char_roman_to_num, num), 0)
 
 
+@trampoline
 def fixpoint(f, x: Any):
     """Applies f to x until a fixpoint is reached.
     >>> fixpoint(lambda x: x*x-2, 1)
@@ -1615,7 +2929,7 @@ def fixpoint(f, x: Any):
     if f(x) == x:
         return x
     else:
-        return fixpoint(f, f(x))
+        return (yield fixpoint.call(f, f(x)))
 
 
 def num_to_roman(num: int) -> int:
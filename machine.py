@@ -0,0 +1,801 @@
+import hashlib
+import os
+from collections import deque
+from contextlib import suppress
+from functools import lru_cache
+from itertools import count
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed to run programs in batches
+    np = None
+
+MEMORY_SIZE = 256
+REGISTERS = 16
+MULTIPLIER = Path(__file__).with_name("multiplier-t.txt")
+
+
+def parse_program(text: str) -> bytearray:
+    """Memory image of a program written one instruction per line as
+    HEX;description;, the hex bytes going to consecutive cells from 00.
+    >>> parse_program("2110;Load x;\\n220F;Load y;\\nC000").hex(" ")[:14]
+    '21 10 22 0f c0'
+    """
+    memory = bytearray(MEMORY_SIZE)
+    cell = 0
+    for number, line in enumerate(text.splitlines(), 1):
+        field = line.split(";", 1)[0].strip()
+        if not field:
+            continue
+        try:
+            code = bytes.fromhex(field)
+        except ValueError:
+            raise ValueError(f"line {number}: {field!r} is not hex") from None
+        if cell + len(code) > MEMORY_SIZE:
+            raise ValueError(f"line {number}: program does not fit in memory")
+        memory[cell : cell + len(code)] = code
+        cell += len(code)
+    return memory
+
+
+def load_program(path: str | Path) -> bytearray:
+    """Memory image of the program in the file at path."""
+    return parse_program(Path(path).read_text())
+
+
+# Opcode and operands of each mnemonic, r for a register, n for a number or
+# label and [n] for a memory cell. A load without brackets is a load of its
+# number, opcode 2.
+_MNEMONICS = {
+    "load": (0x1, "r[n]"),
+    "store": (0x3, "r[n]"),
+    "move": (0x4, "rr"),
+    "add": (0x5, "rrr"),
+    "addf": (0x6, "rrr"),
+    "or": (0x7, "rrr"),
+    "and": (0x8, "rrr"),
+    "xor": (0x9, "rrr"),
+    "ror": (0xA, "rn"),
+    "jeq": (0xB, "rn"),
+    "jmp": (0xB, "n"),
+    "halt": (0xC, ""),
+    "jgt": (0xD, "rn"),
+}
+
+# Description of each instruction in the HEX;description; format.
+_DESCRIPTIONS = {
+    0x1: "Copy bits in cell {xy} to register {r}",
+    0x2: "Copy bit-string {xy} to register {r}",
+    0x3: "Copy bits in register {r} to cell {xy}",
+    0x4: "Copy bits in register {s} to register {t}",
+    0x5: "Add bits in registers {s} and {t} (two's-complement), put in {r}",
+    0x6: "Add bits in registers {s} and {t} (floating-point), put in {r}",
+    0x7: "Bitwise OR bits in registers {s} and {t}, put in register {r}",
+    0x8: "Bitwise AND bits in registers {s} and {t}, put in register {r}",
+    0x9: "Bitwise XOR bits in registers {s} and {t}, put in register {r}",
+    0xA: "Rotate bits in register {r} cyclically right {t} steps",
+    0xB: "Jump to cell {xy} if register {r} equals register 0",
+    0xC: "Halt",
+    0xD: "Jump to cell {xy} if register {r} is greater than register 0",
+}
+
+
+def describe(instruction: bytes) -> str:
+    """Description of a 2 byte instruction.
+    >>> describe(bytes.fromhex("D31E"))
+    'Jump to cell 1E if register 3 is greater than register 0'
+    """
+    op, xy = instruction
+    return _DESCRIPTIONS[op >> 4].format(
+        r=f"{op & 15:X}", xy=f"{xy:02X}", s=f"{xy >> 4:X}", t=f"{xy & 15:X}"
+    )
+
+
+def assemble(source: str) -> tuple[bytearray, str]:
+    """Memory image of an assembly program, and the program written in the
+    HEX;description; format. Each line holds an optional label, an
+    instruction or a byte directive and an optional comment after #, and
+    labels can be used wherever a number is expected.
+    >>> image, text = assemble('''
+    ...         load r1, 3
+    ... loop:   add r2, r2, r1   # Add 3
+    ...         jeq r0, loop
+    ... data:   byte 0xF0
+    ... ''')
+    >>> image[:7].hex(" ")
+    '21 03 52 21 b0 02 f0'
+    >>> print(text)
+    2103;Copy bit-string 03 to register 1;
+    5221;Add bits in registers 2 and 1 (two's-complement), put in 2 # Add 3;
+    B002;Jump to cell 02 if register 0 equals register 0;
+    F0;;
+    """
+    # first pass: the address of every line and label
+    lines = []
+    labels: dict[str, int] = {}
+    cell = 0
+    for number, line in enumerate(source.splitlines(), 1):
+        code, _, comment = line.partition("#")
+        label, colon, statement = code.partition(":")
+        if not colon:
+            label, statement = "", code
+        if label.strip():
+            if label.strip() in labels:
+                raise ValueError(f"line {number}: label {label.strip()} is redefined")
+            labels[label.strip()] = cell
+        mnemonic, _, operands = statement.strip().partition(" ")
+        if not mnemonic:
+            continue
+        fields = [field.strip() for field in operands.split(",") if field.strip()]
+        size = len(fields) if mnemonic == "byte" else 2
+        if cell + size > MEMORY_SIZE:
+            raise ValueError(f"line {number}: program does not fit in memory")
+        lines.append((number, mnemonic, fields, comment.strip()))
+        cell += size
+
+    def value(number: int, field: str, bits: int) -> int:
+        try:
+            result = labels[field] if field in labels else int(field, 0)
+        except ValueError:
+            raise ValueError(f"line {number}: unknown label {field}") from None
+        if not 0 <= result < 1 << bits:
+            raise ValueError(f"line {number}: {field} does not fit in {bits} bits")
+        return result
+
+    # second pass: the code, now that all labels are known
+    image, text = bytearray(MEMORY_SIZE), []
+    cell = 0
+    for number, mnemonic, fields, comment in lines:
+        if mnemonic == "byte":
+            code = bytes(value(number, field, 8) for field in fields)
+            description = ""
+        else:
+            if mnemonic not in _MNEMONICS:
+                raise ValueError(f"line {number}: unknown instruction {mnemonic}")
+            op, signature = _MNEMONICS[mnemonic]
+            if mnemonic == "load" and fields and fields[-1][:1] != "[":
+                op, signature = 0x2, "rn"
+            kinds = signature.replace("[n]", "m")
+            if len(fields) != len(kinds):
+                raise ValueError(
+                    f"line {number}: {mnemonic} takes {len(kinds)} operands"
+                )
+            nibbles = []
+            for kind, field in zip(kinds, fields):
+                if kind == "r":
+                    if field[:1] not in ("r", "R"):
+                        raise ValueError(f"line {number}: {field} is not a register")
+                    nibbles.append(value(number, field[1:], 4))
+                elif kind == "m":
+                    if not (field.startswith("[") and field.endswith("]")):
+                        raise ValueError(f"line {number}: {field} is not a cell")
+                    nibbles.append(value(number, field[1:-1].strip(), 8))
+                else:
+                    nibbles.append(value(number, field, 4 if op == 0xA else 8))
+            if op in (0x5, 0x6, 0x7, 0x8, 0x9):
+                r, s, t = nibbles
+                code = bytes((op << 4 | r, s << 4 | t))
+            elif op == 0x4:
+                code = bytes((op << 4, nibbles[0] << 4 | nibbles[1]))
+            elif mnemonic == "jmp":
+                code = bytes((op << 4, nibbles[0]))
+            else:
+                r, xy = (nibbles + [0, 0])[:2]
+                code = bytes((op << 4 | r, xy))
+            description = describe(code)
+        image[cell : cell + len(code)] = code
+        cell += len(code)
+        if comment:
+            description = f"{description} # {comment}" if description else comment
+        text.append(f"{code.hex().upper()};{description};")
+    return image, "\n".join(text)
+
+
+def load_cached(path: str | Path, cache_dir: str | Path | None = None) -> bytearray:
+    """Memory image of the program in the file at path, written in assembly
+    when its name ends in .asm or in the HEX;description; format otherwise.
+    The image is kept in cache_dir, by default the __pycache__ directory next
+    to the file, under a hash of the source, so that loading the same source
+    again reads 256 bytes instead of parsing it.
+    >>> load_cached(MULTIPLIER.with_name("multiplier.asm")) == load_program(MULTIPLIER)
+    True
+    """
+    path = Path(path)
+    source = path.read_bytes()
+    cache = Path(cache_dir) if cache_dir is not None else path.parent / "__pycache__"
+    cached = cache / f"{path.name}.{hashlib.sha256(source).hexdigest()[:32]}.img"
+    image = bytearray(MEMORY_SIZE)
+    with suppress(FileNotFoundError), open(cached, "rb") as file:
+        if file.readinto(image) == MEMORY_SIZE:
+            return image
+    text = source.decode()
+    image = assemble(text)[0] if path.suffix == ".asm" else parse_program(text)
+    cache.mkdir(parents=True, exist_ok=True)
+    partial = cached.with_name(f"{cached.name}.{os.getpid()}")
+    partial.write_bytes(image)
+    os.replace(partial, cached)
+    return image
+
+
+def _float_value(bits: int) -> float:
+    """Value of the 8 bit floating point format of the machine: a sign bit, a
+    3 bit exponent in excess 4 and a 4 bit mantissa with the point in front."""
+    value = (bits & 15) / 16 * 2.0 ** ((bits >> 4 & 7) - 4)
+    return -value if bits & 0x80 else value
+
+
+def _float_bits(value: float) -> int:
+    """Closest 8 bit floating point pattern towards zero to value, saturating
+    when value is too large."""
+    sign = 0x80 if value < 0 else 0
+    for exponent in range(7, 0, -1):
+        mantissa = int(abs(value) * 16 / 2.0 ** (exponent - 4))
+        if mantissa >= 8:
+            return sign | exponent << 4 | min(mantissa, 15)
+    mantissa = int(abs(value) * 256)
+    return sign | mantissa if mantissa else 0
+
+
+def _signed(bits: int) -> int:
+    return bits - 256 if bits & 0x80 else bits
+
+
+# Each instruction is executed by the handler of its opcode, called with the
+# memory, the registers, its second nibble, its second byte and the address of
+# the next instruction, and returning the address to continue at, or None to
+# halt.
+Handler = Callable[[bytearray, bytearray, int, int, int], "int | None"]
+
+
+def _illegal(
+    memory: bytearray, registers: bytearray, r: int, xy: int, pc: int
+) -> int | None:
+    start = (pc - 2) % MEMORY_SIZE
+    raise ValueError(f"illegal instruction {memory[start]:02X}{xy:02X} at {start:02X}")
+
+
+def _load(
+    memory: bytearray, registers: bytearray, r: int, xy: int, pc: int
+) -> int | None:
+    registers[r] = memory[xy]
+    return pc
+
+
+def _load_immediate(
+    memory: bytearray, registers: bytearray, r: int, xy: int, pc: int
+) -> int | None:
+    registers[r] = xy
+    return pc
+
+
+def _store(
+    memory: bytearray, registers: bytearray, r: int, xy: int, pc: int
+) -> int | None:
+    memory[xy] = registers[r]
+    return pc
+
+
+def _move(
+    memory: bytearray, registers: bytearray, r: int, xy: int, pc: int
+) -> int | None:
+    registers[xy & 15] = registers[xy >> 4]
+    return pc
+
+
+def _add(
+    memory: bytearray, registers: bytearray, r: int, xy: int, pc: int
+) -> int | None:
+    registers[r] = (registers[xy >> 4] + registers[xy & 15]) & 0xFF
+    return pc
+
+
+def _add_float(
+    memory: bytearray, registers: bytearray, r: int, xy: int, pc: int
+) -> int | None:
+    registers[r] = _float_bits(
+        _float_value(registers[xy >> 4]) + _float_value(registers[xy & 15])
+    )
+    return pc
+
+
+def _or(
+    memory: bytearray, registers: bytearray, r: int, xy: int, pc: int
+) -> int | None:
+    registers[r] = registers[xy >> 4] | registers[xy & 15]
+    return pc
+
+
+def _and(
+    memory: bytearray, registers: bytearray, r: int, xy: int, pc: int
+) -> int | None:
+    registers[r] = registers[xy >> 4] & registers[xy & 15]
+    return pc
+
+
+def _xor(
+    memory: bytearray, registers: bytearray, r: int, xy: int, pc: int
+) -> int | None:
+    registers[r] = registers[xy >> 4] ^ registers[xy & 15]
+    return pc
+
+
+def _rotate(
+    memory: bytearray, registers: bytearray, r: int, xy: int, pc: int
+) -> int | None:
+    k = (xy & 15) % 8
+    registers[r] = (registers[r] >> k | registers[r] << (8 - k)) & 0xFF
+    return pc
+
+
+def _jump_equal(
+    memory: bytearray, registers: bytearray, r: int, xy: int, pc: int
+) -> int | None:
+    return xy if registers[r] == registers[0] else pc
+
+
+def _halt(
+    memory: bytearray, registers: bytearray, r: int, xy: int, pc: int
+) -> int | None:
+    return None
+
+
+def _jump_greater(
+    memory: bytearray, registers: bytearray, r: int, xy: int, pc: int
+) -> int | None:
+    return xy if _signed(registers[r]) > _signed(registers[0]) else pc
+
+
+DISPATCH: list[Handler] = [
+    _illegal,  # 0
+    _load,  # 1RXY  R = memory[XY]
+    _load_immediate,  # 2RXY  R = XY
+    _store,  # 3RXY  memory[XY] = R
+    _move,  # 40RS  S = R
+    _add,  # 5RST  R = S + T in two's complement
+    _add_float,  # 6RST  R = S + T in floating point
+    _or,  # 7RST  R = S | T
+    _and,  # 8RST  R = S & T
+    _xor,  # 9RST  R = S ^ T
+    _rotate,  # AR0X  rotate R right X bits
+    _jump_equal,  # BRXY  jump to XY if R == R0
+    _halt,  # C000  halt
+    _jump_greater,  # DRXY  jump to XY if R > R0 in two's complement
+    _illegal,  # E
+    _illegal,  # F
+]
+
+
+class Machine:
+    """The 8 bit register machine, with 256 cells of memory, 16 registers and
+    2 byte instructions that are looked up in the DISPATCH table by opcode.
+    >>> program = load_program(MULTIPLIER)
+    >>> program[1], program[3] = 3, 4  # the factors
+    >>> machine = Machine(program).run()
+    >>> machine.halted, machine.steps, machine.memory[0x22]
+    (True, 77, 12)
+    """
+
+    __slots__ = ("memory", "registers", "pc", "halted", "steps")
+
+    def __init__(self, program: bytes | bytearray = b"") -> None:
+        self.memory = bytearray(MEMORY_SIZE)
+        self.memory[: len(program)] = program
+        self.registers = bytearray(REGISTERS)
+        self.pc = 0
+        self.halted = False
+        self.steps = 0
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "Machine":
+        return cls(load_program(path))
+
+    def step(self) -> bool:
+        """Execute one instruction, returning False once the machine halted."""
+        return not self.run(1).halted
+
+    def run(self, max_steps: int | None = None) -> "Machine":
+        """Execute instructions until the machine halts, or for at most
+        max_steps instructions."""
+        memory, registers, dispatch = self.memory, self.registers, DISPATCH
+        pc, steps = self.pc, 0
+        try:
+            if not self.halted:
+                for _ in count() if max_steps is None else range(max_steps):
+                    op, xy = memory[pc], memory[(pc + 1) & 0xFF]
+                    next_pc = dispatch[op >> 4](
+                        memory, registers, op & 15, xy, (pc + 2) & 0xFF
+                    )
+                    steps += 1
+                    if next_pc is None:
+                        self.halted = True
+                        pc = (pc + 2) & 0xFF
+                        break
+                    pc = next_pc
+        finally:
+            # an illegal instruction leaves the machine in front of it
+            self.pc = pc
+            self.steps += steps
+        return self
+
+    def state(self) -> tuple[bytes, bytes]:
+        """Copies of the memory and the registers."""
+        return bytes(self.memory), bytes(self.registers)
+
+
+# Python source of each instruction in a compiled block, where m is the memory,
+# r the registers and next the address of the following instruction.
+_SOURCE = {
+    0x1: "r[{r}] = m[{xy}]",
+    0x2: "r[{r}] = {xy}",
+    0x3: "m[{xy}] = r[{r}]",
+    0x4: "r[{t}] = r[{s}]",
+    0x5: "r[{r}] = (r[{s}] + r[{t}]) & 255",
+    0x6: "r[{r}] = _float_bits(_float_value(r[{s}]) + _float_value(r[{t}]))",
+    0x7: "r[{r}] = r[{s}] | r[{t}]",
+    0x8: "r[{r}] = r[{s}] & r[{t}]",
+    0x9: "r[{r}] = r[{s}] ^ r[{t}]",
+    0xA: "r[{r}] = (r[{r}] >> {k} | r[{r}] << 8 - {k}) & 255",
+    0xB: "return {xy} if r[{r}] == r[0] else {next}",
+    0xC: "return -1",
+    0xD: "return {xy} if r[{r}] ^ 128 > r[0] ^ 128 else {next}",
+}
+_BLOCK_LIMIT = 64
+
+
+class Block:
+    """A basic block of instructions compiled into a single Python function,
+    which executes them on the memory and registers and returns the address
+    to continue at, or -1 when it halted."""
+
+    __slots__ = ("start", "end", "steps", "writes", "run")
+
+    def __init__(self, start: int, code: bytes) -> None:
+        self.start, self.end, self.steps = start, start + len(code), len(code) // 2
+        lines = ["def block(m, r):"]
+        writes = []
+        for i in range(0, len(code), 2):
+            op, xy = code[i], code[i + 1]
+            fields = dict(r=op & 15, xy=xy, s=xy >> 4, t=xy & 15, k=(xy & 15) % 8)
+            lines.append(
+                "    " + _SOURCE[op >> 4].format(next=(start + i + 2) & 0xFF, **fields)
+            )
+            if op >> 4 == 0x3:
+                writes.append(xy)
+        if code[-2] >> 4 not in (0xB, 0xC, 0xD):
+            lines.append(f"    return {self.end & 0xFF}")
+        namespace = {"_float_bits": _float_bits, "_float_value": _float_value}
+        exec(compile("\n".join(lines), f"<block {start:02X}>", "exec"), namespace)
+        self.writes = tuple(writes)
+        self.run: Callable[[bytearray, bytearray], int] = namespace["block"]
+
+
+def _block_end(memory: bytearray, start: int) -> int:
+    """Address after the basic block starting at start, which ends with a jump
+    or halt, before an illegal instruction or one crossing the end of memory,
+    or after a store that may change one of its own later instructions."""
+    pc = start
+    while pc < MEMORY_SIZE - 1 and pc - start < 2 * _BLOCK_LIMIT:
+        op = memory[pc] >> 4
+        if op not in _SOURCE:
+            break
+        pc += 2
+        if op in (0xB, 0xC, 0xD) or op == 0x3 and memory[pc - 1] >= pc - 2:
+            break
+    return pc
+
+
+@lru_cache(maxsize=4096)
+def compile_block(start: int, code: bytes) -> Block:
+    """The block of the instructions code at address start, compiled once for
+    every program containing it."""
+    return Block(start, code)
+
+
+class BlockMachine(Machine):
+    """Machine running programs a basic block at a time, each translated to a
+    Python function once it is entered a second time, with the same results as
+    interpreting them one instruction at a time. A store into the code of a
+    translated block throws the translation away.
+    >>> program = load_program(MULTIPLIER)
+    >>> program[1], program[3] = 3, 4  # the factors
+    >>> machine = BlockMachine(program).run()
+    >>> machine.halted, machine.steps, machine.memory[0x22]
+    (True, 77, 12)
+
+    The loop at 06 is translated on its third pass and then stores the sum
+    into its own first instruction, so the last pass must add 8, not 4.
+    >>> program = bytes.fromhex("2104 22FF 2000 2402 5554 5112 B114 3507 B006 0000")
+    >>> program += bytes.fromhex("3520 C000")
+    >>> machine, plain = BlockMachine(program).run(), Machine(program).run()
+    >>> machine.memory[0x20], machine.steps
+    (16, 27)
+    >>> state = lambda m: (bytes(m.memory), bytes(m.registers), m.pc, m.steps)
+    >>> state(machine) == state(plain)
+    True
+    """
+
+    __slots__ = ()
+
+    def run(self, max_steps: int | None = None) -> "Machine":
+        memory, registers = self.memory, self.registers
+        blocks: dict[int, Block] = {}
+        owners: dict[int, list[int]] = {}  # starts of the blocks using a cell
+        entered: set[int] = set()
+        left = -1 if max_steps is None else max_steps
+
+        def invalidate(cells: Iterable[int]) -> None:
+            for cell in cells:
+                for start in owners.pop(cell, ()):
+                    blocks.pop(start, None)
+
+        while not self.halted and left != 0:
+            start = self.pc
+            block = blocks.get(start)
+            if block is None:
+                end = _block_end(memory, start)
+                if end == start or start not in entered:
+                    # code run once is cheaper to interpret than to compile,
+                    # and illegal instructions are reported by the interpreter
+                    entered.add(start)
+                    n = (end - start) // 2 or 1
+                    n = n if left < 0 else min(n, left)
+                    addresses = range(start, start + 2 * n, 2)
+                    writes = [
+                        memory[(a + 1) & 0xFF] for a in addresses if memory[a] >> 4 == 3
+                    ]
+                    steps = self.steps
+                    super().run(n)
+                    left -= self.steps - steps
+                    invalidate(writes)
+                    continue
+                block = compile_block(start, bytes(memory[start:end]))
+                blocks[start] = block
+                for cell in range(start, end):
+                    owners.setdefault(cell, []).append(start)
+            if 0 <= left < block.steps:
+                super().run(left)
+                break
+            pc = block.run(memory, registers)
+            self.steps += block.steps
+            left -= block.steps
+            if block.writes:
+                invalidate(block.writes)
+            if pc < 0:
+                self.halted = True
+                pc = block.end & 0xFF
+            self.pc = pc
+        return self
+
+
+class BatchMachine:
+    """Many independent copies of the machine, or lanes, run in lockstep on
+    NumPy arrays: every step executes one instruction in all lanes that are
+    at the same address, so that a program is run on thousands of inputs
+    with a few array operations per instruction. Lanes that took another
+    path wait until they are the furthest behind again.
+    >>> if np is not None:  # the example needs NumPy like the class itself
+    ...     batch = BatchMachine.over(load_program(MULTIPLIER), {1: [3, 5], 3: [4, 6]})
+    ...     assert batch.run().memory[:, 0x22].tolist() == [12, 18, 20, 30]
+    ...     assert batch.steps.tolist() == [77, 77, 77, 77]
+    """
+
+    __slots__ = ("memory", "registers", "pc", "halted", "steps")
+
+    def __init__(self, program: bytes | bytearray, lanes: int) -> None:
+        if np is None:
+            raise ImportError("BatchMachine needs NumPy")
+        image = np.zeros(MEMORY_SIZE, np.uint8)
+        image[: len(program)] = np.frombuffer(bytes(program), np.uint8)
+        self.memory = np.tile(image, (lanes, 1))
+        self.registers = np.zeros((lanes, REGISTERS), np.uint8)
+        self.pc = np.zeros(lanes, np.int64)
+        self.halted = np.zeros(lanes, bool)
+        self.steps = np.zeros(lanes, np.int64)
+
+    @classmethod
+    def over(
+        cls, program: bytes | bytearray, inputs: dict[int, Iterable[int]]
+    ) -> "BatchMachine":
+        """One lane for every combination of the values given for some cells,
+        written into those cells, the last cell varying fastest."""
+        if np is None:
+            raise ImportError("BatchMachine needs NumPy")
+        grids = np.meshgrid(*map(list, inputs.values()), indexing="ij")
+        batch = cls(program, grids[0].size if grids else 1)
+        for cell, values in zip(inputs, grids):
+            batch.memory[:, cell] = values.ravel()
+        return batch
+
+    def run(self, max_steps: int | None = None) -> "BatchMachine":
+        """Execute until every lane halted, or executed max_steps instructions."""
+        memory, registers = self.memory, self.registers
+        while True:
+            waiting = ~self.halted
+            if max_steps is not None:
+                waiting &= self.steps < max_steps
+            if not waiting.any():
+                return self
+            pc = self.pc[waiting].min()
+            lanes = np.flatnonzero(waiting & (self.pc == pc))
+            ops = memory[lanes, pc]
+            for op in np.unique(ops >> 4).tolist():
+                group = lanes[ops >> 4 == op] if len(lanes) > 1 else lanes
+                self._execute(op, group, int(pc))
+
+    def _execute(self, op: int, lanes: Any, pc: int) -> None:
+        """Execute the instruction at pc, of opcode op, in the given lanes."""
+        memory, registers = self.memory, self.registers
+        r = memory[lanes, pc] & 15
+        xy = memory[lanes, (pc + 1) & 0xFF]
+        s, t = xy >> 4, xy & 15
+        next_pc = (pc + 2) & 0xFF
+        if op == 0x1:
+            registers[lanes, r] = memory[lanes, xy]
+        elif op == 0x2:
+            registers[lanes, r] = xy
+        elif op == 0x3:
+            memory[lanes, xy] = registers[lanes, r]
+        elif op == 0x4:
+            registers[lanes, t] = registers[lanes, s]
+        elif op == 0x5:
+            registers[lanes, r] = registers[lanes, s] + registers[lanes, t]
+        elif op == 0x6:
+            registers[lanes, r] = _float_table()[
+                registers[lanes, s], registers[lanes, t]
+            ]
+        elif op == 0x7:
+            registers[lanes, r] = registers[lanes, s] | registers[lanes, t]
+        elif op == 0x8:
+            registers[lanes, r] = registers[lanes, s] & registers[lanes, t]
+        elif op == 0x9:
+            registers[lanes, r] = registers[lanes, s] ^ registers[lanes, t]
+        elif op == 0xA:
+            k = (t % 8).astype(np.uint16)
+            value = registers[lanes, r].astype(np.uint16)
+            registers[lanes, r] = (value >> k | value << (8 - k)) & 0xFF
+        elif op in (0xB, 0xD):
+            value, limit = registers[lanes, r], registers[lanes, 0]
+            if op == 0xD:
+                value, limit = value.view(np.int8), limit.view(np.int8)
+            jump = value == limit if op == 0xB else value > limit
+            next_pc = np.where(jump, xy, next_pc)
+        elif op == 0xC:
+            self.halted[lanes] = True
+        else:
+            lane = lanes[0]
+            raise ValueError(
+                f"illegal instruction {memory[lane, pc]:02X}{xy[0]:02X} at"
+                f" {pc:02X} in lane {lane}"
+            )
+        self.pc[lanes] = next_pc
+        self.steps[lanes] += 1
+
+
+@lru_cache(maxsize=None)
+def _float_table() -> Any:
+    """Results of the floating point addition of every pair of bytes."""
+    values = [_float_value(bits) for bits in range(256)]
+    return np.array(
+        [[_float_bits(a + b) for b in values] for a in values], dtype=np.uint8
+    )
+
+
+class Profiler:
+    """Statistics of the instructions a machine executes: how often each cell
+    and each opcode was executed, how often each jump was taken or not, and
+    how often each value was written to each register, with the last trace
+    instructions kept as (step, cell, instruction) in a ring buffer.
+    Programs are profiled by running them with Profiler.run rather than
+    Machine.run, which is left without any instrumentation.
+    >>> profiler = Profiler(trace=2)
+    >>> machine = profiler.run(Machine(load_program(MULTIPLIER)))
+    >>> profiler.cells[0x0C], profiler.jumps[0x18], sum(profiler.writes[3])
+    (9, [7, 1], 9)
+    >>> print(profiler.format_trace())
+       74  1E  3422  Copy bits in register 4 to cell 22
+       75  20  C000  Halt
+    """
+
+    __slots__ = ("cells", "opcodes", "jumps", "writes", "trace", "_code")
+
+    def __init__(self, trace: int = 0) -> None:
+        self.cells = [0] * MEMORY_SIZE
+        self.opcodes = [0] * 16
+        self.jumps: dict[int, list[int]] = {}  # cell: [taken, not taken]
+        self.writes = [[0] * 256 for _ in range(REGISTERS)]
+        self.trace: deque[tuple[int, int, int]] | None = (
+            deque(maxlen=trace) if trace else None
+        )
+        self._code: dict[int, int] = {}  # last instruction executed at a cell
+
+    def run(self, machine: Machine, max_steps: int | None = None) -> Machine:
+        """Machine.run, collecting the statistics of the instructions."""
+        memory, registers, dispatch = machine.memory, machine.registers, DISPATCH
+        cells, opcodes, writes, trace = (
+            self.cells,
+            self.opcodes,
+            self.writes,
+            self.trace,
+        )
+        pc, steps = machine.pc, 0
+        try:
+            if not machine.halted:
+                for _ in count() if max_steps is None else range(max_steps):
+                    op, xy = memory[pc], memory[(pc + 1) & 0xFF]
+                    self._code[pc] = op << 8 | xy
+                    if trace is not None:
+                        trace.append((machine.steps + steps + 1, pc, op << 8 | xy))
+                    code, r = op >> 4, op & 15
+                    next_pc = dispatch[code](memory, registers, r, xy, (pc + 2) & 0xFF)
+                    steps += 1
+                    cells[pc] += 1
+                    opcodes[code] += 1
+                    if code in (0xB, 0xD):
+                        taken = (
+                            registers[r] == registers[0]
+                            if code == 0xB
+                            else _signed(registers[r]) > _signed(registers[0])
+                        )
+                        self.jumps.setdefault(pc, [0, 0])[not taken] += 1
+                    elif code == 0x4:
+                        writes[xy & 15][registers[xy & 15]] += 1
+                    elif code not in (0x3, 0xC):
+                        writes[r][registers[r]] += 1
+                    if next_pc is None:
+                        machine.halted = True
+                        pc = (pc + 2) & 0xFF
+                        break
+                    pc = next_pc
+        finally:
+            machine.pc = pc
+            machine.steps += steps
+        return machine
+
+    def report(self) -> str:
+        """Flat profile of the executed cells, the most executed first."""
+        total = sum(self.cells) or 1
+        lines = ["cell  code     count       %   taken  not taken  description"]
+        for cell in sorted(self._code, key=lambda cell: -self.cells[cell]):
+            code = self._code[cell].to_bytes(2, "big")
+            taken, not_taken = self.jumps.get(cell, ("", ""))
+            lines.append(
+                f"  {cell:02X}  {code.hex().upper()}  {self.cells[cell]:8}"
+                f"  {100 * self.cells[cell] / total:6.2f}  {taken:>6}  {not_taken:>9}"
+                f"  {_describe_or_illegal(code)}"
+            )
+        return "\n".join(lines)
+
+    def format_trace(self) -> str:
+        """The instructions in the trace, oldest first, as step, cell,
+        instruction and description."""
+        return "\n".join(
+            f"{step:5}  {cell:02X}  {code:04X}  "
+            f"{_describe_or_illegal(code.to_bytes(2, 'big'))}"
+            for step, cell, code in self.trace or ()
+        )
+
+
+def _describe_or_illegal(instruction: bytes) -> str:
+    try:
+        return describe(instruction)
+    except KeyError:
+        return "illegal"
+
+
+def run_program(
+    program: bytes | bytearray | str | Path, max_steps: int | None = 1_000_000
+) -> tuple[bytes, bytes]:
+    """Run a memory image, or the program in a file, from address 00 until it
+    halts, and return the final memory and registers.
+    >>> memory, registers = run_program(parse_program("2203\\n2305\\n5123\\nC000"))
+    >>> registers[:4].hex(" ")
+    '00 08 03 05'
+    """
+    if isinstance(program, (str, Path)):
+        program = load_program(program)
+    machine = Machine(program).run(max_steps)
+    if not machine.halted:
+        raise RuntimeError(f"no halt within {max_steps} steps")
+    return machine.state()
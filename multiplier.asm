@@ -0,0 +1,19 @@
+# Source of multiplier-t.txt, multiplying x and y into cell result.
+        load r1, 0x10       # Load x
+        load r2, 0x0F       # Load y
+        load r3, 0          # Set counter to 0
+        load r4, 0          # Set sum to 0
+        load r5, 1          # Set to 0x01 for bitwise and, and to add  1 to counter
+repeat: load r0, 7          # Set limit to 7, because we only have to add 8 times, because it's 8 bit numbers
+        jgt r3, exit        # Jump to exit if counter is 8
+        ror r1, 1           # Bitshift x by 1 to the right
+        and r6, r5, r1      # Set z to bitwise x and 0x01
+        ror r2, 7           # Bitshift y by 1 to the left
+        add r3, r5, r3      # Add 1 to counter
+        load r0, 0          # Set register 0 to 0x00
+        jeq r6, repeat      # Jump to repeat multiply if z is 0, because then we don't need to add
+        add r4, r2, r4      # Add y to sum
+        jmp repeat          # Always jump to repeat multiply
+exit:   store r4, [result]  # Save multiplication result to cell 0x22
+        halt
+result: byte 0xF0, 0x00